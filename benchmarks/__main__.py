@@ -0,0 +1,147 @@
+# ==========================================================
+# __main__.py
+# Copyright (C) 2023 Kei Shioda.  All rights reserved.
+# ==========================================================
+''' This module runs benchmarks and compares their results.
+
+python -m benchmarks run --output results.json
+python -m benchmarks compare baseline.json results.json
+python -m benchmarks speedup --workers 1 2 4 8 16
+'''
+from benchmarks import perft, micro, speedup
+from reversi import selfplay
+import argparse
+import io
+import json
+import platform
+import sys
+
+# keys of results where a smaller value is better or a larger one is better
+LOWER_IS_BETTER = ("seconds", "ns_per_call")
+HIGHER_IS_BETTER = ("nodes_per_sec", "games_per_sec", "moves_per_sec")
+
+def run(args) -> int:
+    ''' This method runs all benchmarks and writes their results.
+    
+    :param args: parsed arguments
+    :return: an exit status
+    '''
+    results = {"python": platform.python_version()}
+    results["perft"] = perft.run(args.perft_depth)
+    print("perft(%d) = %d (%s), %.0f nodes/sec" % (args.perft_depth, results["perft"]["nodes"],
+          "ok" if results["perft"]["ok"] else "expected %s" % results["perft"]["expected"],
+          results["perft"]["nodes_per_sec"]))
+    
+    results["micro"] = micro.run(args.repeat)
+    for name, r in results["micro"].items():
+        print("%s: %.0f ns/call" % (name, r["ns_per_call"]))
+    
+    stats = selfplay.run(args.games, args.workers, output=io.StringIO(), report=None, depth=1)
+    results["selfplay"] = {key: stats[key]
+                           for key in ("games", "moves", "games_per_sec", "moves_per_sec")}
+    print("selfplay: %.1f games/sec, %.1f moves/sec"
+          % (stats["games_per_sec"], stats["moves_per_sec"]))
+    
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    return 0 if results["perft"]["ok"] else 1
+
+def _flatten(results: dict, prefix: str = "") -> dict:
+    ''' This method flattens nested results into paths and values.
+    
+    :param results: a dictionary of results
+    :param prefix: a path of the dictionary
+    :return: a dictionary of paths such as "micro.count.ns_per_call"
+    '''
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, prefix + key + "."))
+        else:
+            flat[prefix + key] = value
+    return flat
+
+def compare(args) -> int:
+    ''' This method compares results with a baseline and flags regressions.
+    
+    :param args: parsed arguments
+    :return: an exit status.  1 if there is a regression.
+    '''
+    with open(args.baseline) as f:
+        baseline = _flatten(json.load(f))
+    with open(args.results) as f:
+        results = _flatten(json.load(f))
+    
+    regressions = 0
+    if results.get("perft.ok") is False:
+        print("REGRESSION perft: %s nodes, expected %s"
+              % (results["perft.nodes"], results["perft.expected"]))
+        regressions += 1
+    for path, value in sorted(results.items()):
+        key = path.rsplit(".", 1)[-1]
+        old = baseline.get(path)
+        if old is None or not isinstance(value, (int, float)) or old == 0:
+            continue
+        if key in LOWER_IS_BETTER:
+            change = value / old - 1
+        elif key in HIGHER_IS_BETTER:
+            change = old / value - 1 if value > 0 else float("inf")
+        else:
+            continue
+        mark = "REGRESSION" if change > args.threshold else "ok"
+        regressions += mark == "REGRESSION"
+        print("%-10s %s: %.4g -> %.4g (slowdown %+.1f%%)" % (mark, path, old, value, change * 100))
+    return 1 if regressions > 0 else 0
+
+def measure_speedup(args) -> int:
+    ''' This method measures the speedup of the parallel search.
+    
+    :param args: parsed arguments
+    :return: an exit status
+    '''
+    results = speedup.run(args.workers, args.depth, args.positions)
+    for n, r in results.items():
+        print("%s workers: %.2f sec, %.0f nodes/sec, speedup %.2f"
+              % (n, r["seconds"], r["nodes_per_sec"], r["speedup"]))
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump({"speedup": results}, f, indent=2)
+    return 0
+
+def main() -> int:
+    ''' This method parses arguments and runs a command.
+    
+    :return: an exit status
+    '''
+    parser = argparse.ArgumentParser(prog="benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    r = commands.add_parser("run", help="run benchmarks")
+    r.add_argument("--output", default="benchmark.json", help="a file results are written to")
+    r.add_argument("--perft-depth", type=int, default=7, help="the depth of perft")
+    r.add_argument("--repeat", type=int, default=20, help="repetitions of micro-benchmarks")
+    r.add_argument("--games", type=int, default=20, help="games of self-play")
+    r.add_argument("--workers", type=int, default=None, help="processes of self-play")
+    
+    c = commands.add_parser("compare", help="compare results with a baseline")
+    c.add_argument("baseline", help="a file of baseline results")
+    c.add_argument("results", help="a file of new results")
+    c.add_argument("--threshold", type=float, default=0.1, help="a tolerated ratio of slowdown")
+    
+    s = commands.add_parser("speedup", help="measure the speedup of the parallel search")
+    s.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="numbers of workers")
+    s.add_argument("--depth", type=int, default=7, help="the depth of searches")
+    s.add_argument("--positions", type=int, default=10, help="the number of situations")
+    s.add_argument("--output", default=None, help="a file results are written to")
+    
+    args = parser.parse_args()
+    match args.command:
+        case "run":
+            return run(args)
+        case "compare":
+            return compare(args)
+        case "speedup":
+            return measure_speedup(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
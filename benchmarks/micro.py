@@ -0,0 +1,92 @@
+# ==========================================================
+# micro.py
+# Copyright (C) 2023 Kei Shioda.  All rights reserved.
+# ==========================================================
+''' This module measures hot paths of the model module on fixed
+situations of games.
+'''
+from __future__ import annotations
+from reversi.model import Board, Color, Game
+import random
+import time
+
+def make_games(n: int, seed: int = 0) -> list:
+    ''' This method makes games in various situations by random moves.
+    
+    :param n: the number of games
+    :param seed: a random seed
+    :return: a list of tuples of a game and the color of the player to move
+    '''
+    rng = random.Random(seed)
+    games = []
+    while len(games) < n:
+        game = Game()
+        c = Color.BLACK
+        for i in range(rng.randint(0, 50)):
+            valid = game.get_valid(c)
+            if len(valid) == 0:
+                break
+            (x, y), k = rng.choice(valid)
+            game.put_disc(x + 1, y + 1, c)
+            c = Color.get_opponent(c)
+        if len(game.get_valid(c)) > 0:
+            games.append((game, c))
+    return games
+
+def measure(func, games: list, repeat: int) -> dict:
+    ''' This method measures a function called for every game.
+    
+    :param func: a function which takes a game and a color
+    :param games: a list of tuples of a game and a color
+    :param repeat: how many times all games are processed
+    :return: a dictionary of the number of calls and nanoseconds per call
+    '''
+    start = time.perf_counter()
+    for i in range(repeat):
+        for game, c in games:
+            func(game, c)
+    elapsed = time.perf_counter() - start
+    calls = repeat * len(games)
+    return {"calls": calls, "ns_per_call": elapsed * 1e9 / calls}
+
+def _get_changeable(game: Game, c: Color) -> None:
+    for y in range(1, 9):
+        for x in range(1, 9):
+            game.board.get_changeable(x, y, c)
+
+def _update(game: Game, c: Color) -> None:
+    (x, y), n = game.get_valid(c)[0]
+    game.board.update(x + 1, y + 1, c)
+    game.board.unmake_move()
+
+def _to_color(game: Game, c: Color) -> None:
+    game.board.to_color()
+
+def _count(game: Game, c: Color) -> None:
+    game.board.count()
+
+def _get_valid(game: Game, c: Color) -> None:
+    Board.move_cache.clear()
+    game.get_valid(c)
+
+def _take_pass(game: Game, c: Color) -> None:
+    Board.move_cache.clear()
+    game.take_pass(c)
+
+# functions measured.  get_changeable is called for all 64 squares.
+BENCHMARKS = {"get_changeable": _get_changeable,
+              "update": _update,
+              "to_color": _to_color,
+              "count": _count,
+              "get_valid": _get_valid,
+              "take_pass": _take_pass}
+
+def run(repeat: int = 20, n: int = 50) -> dict:
+    ''' This method measures all hot paths.
+    
+    :param repeat: how many times all games are processed
+    :param n: the number of games
+    :return: a dictionary of results of each function
+    '''
+    games = make_games(n)
+    return {name: measure(func, games, repeat) for name, func in BENCHMARKS.items()}
@@ -0,0 +1,72 @@
+# ==========================================================
+# perft.py
+# Copyright (C) 2023 Kei Shioda.  All rights reserved.
+# ==========================================================
+''' This module counts leaf nodes of the game tree from the initial
+situation (perft) to check move generation and make/unmake.
+
+A pass is counted as a move, and a finished game is a leaf node.
+'''
+from __future__ import annotations
+from reversi import bitboard
+from reversi.model import Board, Color
+import time
+
+# the known numbers of leaf nodes for each depth
+REFERENCE = {1: 4,
+             2: 12,
+             3: 56,
+             4: 244,
+             5: 1396,
+             6: 8200,
+             7: 55092,
+             8: 390216,
+             9: 3005288,
+             10: 24571284,
+             11: 212258800}
+
+def perft(board: Board, c: Color, depth: int, passed: bool = False) -> int:
+    ''' This method counts leaf nodes by Board.put and Board.unmake_move.
+    
+    :param board: a board.  it is restored after counting.
+    :param c: the color of this turn's player
+    :param depth: the remaining depth
+    :param passed: if the previous turn was passed, set true
+    :return: the number of leaf nodes
+    '''
+    if depth == 0:
+        return 1
+    
+    opponent = Color.get_opponent(c)
+    moves = board.get_moves(c)
+    if moves == 0:
+        if passed:
+            return 1
+        board.pass_move(c)
+        n = perft(board, opponent, depth - 1, True)
+        board.unmake_move()
+        return n
+    
+    n = 0
+    for m in bitboard.iter_masks(moves):
+        board.put(m, c)
+        n += perft(board, opponent, depth - 1)
+        board.unmake_move()
+    return n
+
+def run(depth: int) -> dict:
+    ''' This method counts leaf nodes from the initial situation.
+    
+    :param depth: the depth
+    :return: a dictionary of the result
+    '''
+    board = Board()
+    start = time.perf_counter()
+    nodes = perft(board, Color.BLACK, depth)
+    elapsed = time.perf_counter() - start
+    return {"depth": depth,
+            "nodes": nodes,
+            "expected": REFERENCE.get(depth),
+            "ok": REFERENCE.get(depth) in (None, nodes),
+            "seconds": elapsed,
+            "nodes_per_sec": nodes / elapsed if elapsed > 0 else 0.0}
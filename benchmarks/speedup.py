@@ -0,0 +1,41 @@
+# ==========================================================
+# speedup.py
+# Copyright (C) 2023 Kei Shioda.  All rights reserved.
+# ==========================================================
+''' This module measures the speedup of the parallel search by the
+number of workers.  The time to complete a fixed depth is compared.
+'''
+from __future__ import annotations
+from benchmarks.micro import make_games
+from reversi.parallel import ParallelSearcher
+import time
+
+def run(workers: list, depth: int = 7, positions: int = 10) -> dict:
+    ''' This method searches the same situations with each number of
+    workers.
+    
+    :param workers: numbers of workers
+    :param depth: the depth of the searches
+    :param positions: the number of situations
+    :return: a dictionary of numbers of workers and dictionaries of
+             seconds, nodes, nodes_per_sec and speedup
+    '''
+    games = [(game, c) for game, c in make_games(positions * 2, seed=1)
+             if 64 - sum(game.board.count()) > depth + 4][:positions]
+    results = {}
+    for n in workers:
+        searcher = ParallelSearcher(n, max_depth=depth)
+        nodes = 0
+        start = time.perf_counter()
+        for game, c in games:
+            searcher.search(game.board, c)
+            nodes += searcher.nodes
+        seconds = time.perf_counter() - start
+        searcher.close()
+        results[str(n)] = {"seconds": seconds,
+                           "nodes": nodes,
+                           "nodes_per_sec": nodes / seconds}
+    base = results[str(workers[0])]["seconds"]
+    for r in results.values():
+        r["speedup"] = base / r["seconds"]
+    return results
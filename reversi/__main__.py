@@ -4,13 +4,146 @@
 # ==========================================================
 
 from reversi.controller import Controller
+import argparse
+import json
+import sys
+
+def _parse_options(items: list) -> dict:
+    ''' This method parses options of players given as NAME=VALUE.
+    
+    :param items: a list of NAME=VALUE.  a value is read as JSON if
+                  possible, otherwise as a string.
+    :return: a dictionary of the options
+    '''
+    options = {}
+    for item in items:
+        name, value = item.split("=", 1)
+        try:
+            options[name] = json.loads(value)
+        except json.JSONDecodeError:
+            options[name] = value
+    return options
 
 def main():
     '''This method starts this application.
+    
+    Without a command, an interactive game is started.
     '''
-    cont = Controller()
-    cont.start()
+    parser = argparse.ArgumentParser(prog="reversi")
+    parser.add_argument("--metrics", default=None, help="a file events of a game are written to")
+    commands = parser.add_subparsers(dest="command")
+    
+    selfplay = commands.add_parser("selfplay", help="play games between opponent players without screens")
+    selfplay.add_argument("--games", type=int, default=100, help="the number of games")
+    selfplay.add_argument("--workers", type=int, default=None, help="the number of processes")
+    selfplay.add_argument("--seed", type=int, default=0, help="a random seed")
+    selfplay.add_argument("--depth", type=int, default=2, help="the search depth of players")
+    selfplay.add_argument("--time", type=float, default=None, help="seconds players think for a move")
+    selfplay.add_argument("--nodes", type=int, default=None, help="nodes players search for a move")
+    selfplay.add_argument("--endgame", type=int, default=6, help="empty squares players solve perfectly")
+    selfplay.add_argument("--random-plies", type=int, default=4, help="plies played randomly at first")
+    selfplay.add_argument("--output", default=None, help="a file results are written to")
+    selfplay.add_argument("--engines", nargs=2, default=["search", "search"], choices=["search", "mcts"],
+                          help="engines of the black player and the white player")
+    selfplay.add_argument("--record", default=None, help="a record file games are appended to")
+    
+    book = commands.add_parser("book", help="build an opening book from record files")
+    book.add_argument("output", help="a book file to be written")
+    book.add_argument("records", nargs="+", help="record files of games")
+    book.add_argument("--base", default=None, help="a book file whose entries are kept")
+    book.add_argument("--plies", type=int, default=20, help="plies of games stored in the book")
+    book.add_argument("--min-games", type=int, default=2, help="games a book move needs at least")
+    
+    database = commands.add_parser("database", help="build a database of situations from record files")
+    database.add_argument("output", help="a database file to be written")
+    database.add_argument("records", nargs="+", help="record files of games")
+    database.add_argument("--base", default=None, help="a database file whose statistics are added")
+    database.add_argument("--entries", type=int, default=1 << 20, help="entries kept in memory")
+    
+    train = commands.add_parser("train", help="fit weights of the pattern evaluation to record files")
+    train.add_argument("output", help="a weight file to be written")
+    train.add_argument("records", nargs="+", help="record files of games")
+    train.add_argument("--cache", default="train-cache", help="a directory extracted features are kept in")
+    train.add_argument("--epochs", type=int, default=4, help="passes over the situations")
+    train.add_argument("--rate", type=float, default=0.02, help="a learning rate")
+    train.add_argument("--chunk", type=int, default=1 << 16, help="situations processed at once")
+    
+    tournament = commands.add_parser("tournament", help="play a match between two configurations of players")
+    tournament.add_argument("--first", nargs="*", default=[], metavar="NAME=VALUE",
+                            help="options of the first players, e.g. max_depth=3 engine=mcts")
+    tournament.add_argument("--second", nargs="*", default=[], metavar="NAME=VALUE",
+                            help="options of the second players")
+    tournament.add_argument("--pairs", type=int, default=500, help="the maximum number of openings")
+    tournament.add_argument("--plies", type=int, default=6, help="plies of the openings")
+    tournament.add_argument("--workers", type=int, default=None, help="the number of processes")
+    tournament.add_argument("--seed", type=int, default=0, help="a random seed of the openings")
+    tournament.add_argument("--elo0", type=float, default=0.0, help="the Elo difference of H0")
+    tournament.add_argument("--elo1", type=float, default=10.0, help="the Elo difference of H1")
+    tournament.add_argument("--alpha", type=float, default=0.05, help="the false positive rate")
+    tournament.add_argument("--beta", type=float, default=0.05, help="the false negative rate")
+    tournament.add_argument("--output", default=None, help="a file results of games are written to")
+    
+    serve = commands.add_parser("serve", help="serve games to clients over a line protocol")
+    serve.add_argument("--host", default="127.0.0.1", help="a host name to listen on")
+    serve.add_argument("--port", type=int, default=8765, help="a port number to listen on")
+    serve.add_argument("--unix", default=None, help="a path of a Unix socket to listen on instead")
+    serve.add_argument("--workers", type=int, default=None, help="the number of processes of thinking")
+    serve.add_argument("--time", type=float, default=1.0, help="seconds players think for a move")
+    serve.add_argument("--book", default=None, help="an opening book file of players")
+    
+    args = parser.parse_args()
+    match args.command:
+        case "selfplay":
+            from reversi import selfplay as sp
+            output = open(args.output, "w") if args.output is not None else sys.stdout
+            try:
+                sp.run(args.games, args.workers, args.seed, output, record=args.record,
+                       time_limit=args.time, node_limit=args.nodes, depth=args.depth,
+                       endgame_empties=args.endgame, random_plies=args.random_plies,
+                       engines=args.engines)
+            finally:
+                if output is not sys.stdout:
+                    output.close()
+        case "book":
+            from reversi import record
+            from reversi.book import BookBuilder, OpeningBook
+            builder = BookBuilder(args.plies, args.min_games)
+            for path in args.records:
+                for r in record.read(path):
+                    builder.add_game(r["moves"])
+            base = OpeningBook(args.base) if args.base is not None else None
+            print("%d entries" % builder.write(args.output, base))
+        case "database":
+            from reversi.database import DatabaseBuilder, PositionDatabase
+            builder = DatabaseBuilder(args.entries)
+            for path in args.records:
+                builder.add_records(path)
+            base = PositionDatabase(args.base) if args.base is not None else None
+            print("%d entries" % builder.write(args.output, base))
+        case "train":
+            from reversi.train import Trainer
+            trainer = Trainer(args.cache, args.chunk)
+            print("%d positions" % trainer.extract(args.records))
+            print("mean squared error %.2f" % trainer.fit(args.epochs, args.rate))
+            trainer.get_evaluator().save(args.output)
+        case "tournament":
+            from reversi import tournament as tm
+            output = open(args.output, "w") if args.output is not None else None
+            try:
+                result = tm.run(_parse_options(args.first), _parse_options(args.second), args.pairs,
+                                args.workers, args.seed, output, plies=args.plies, elo0=args.elo0,
+                                elo1=args.elo1, alpha=args.alpha, beta=args.beta)
+            finally:
+                if output is not None:
+                    output.close()
+            print(json.dumps(result))
+        case "serve":
+            from reversi import server
+            server.run(args.host, args.port, args.unix, args.workers,
+                       time_limit=args.time, book=args.book)
+        case _:
+            cont = Controller(args.metrics)
+            cont.start()
 
 if __name__ == '__main__':
     main()
-
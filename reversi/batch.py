@@ -0,0 +1,192 @@
+# ==========================================================
+# batch.py
+# Copyright (C) 2023 Kei Shioda.  All rights reserved.
+# ==========================================================
+''' This module defines bit operations on many boards at once.
+
+Boards are given as NumPy arrays of uint64 whose elements have the same
+layout as reversi.bitboard.  This module requires NumPy.
+'''
+from __future__ import annotations
+from reversi import bitboard
+import numpy as np
+
+FULL = np.uint64(bitboard.FULL)
+ZERO = np.uint64(0)
+ONE = np.uint64(1)
+
+# (shift, mask) for each direction as same as bitboard.DIRECTIONS
+DIRECTIONS = [(np.uint64(abs(n)), n > 0, np.uint64(mask))
+              for _, _, n, mask in bitboard.DIRECTIONS]
+
+def _shift(b: np.ndarray, n: np.uint64, up: bool) -> np.ndarray:
+    ''' This method shifts boards.  The overflow is cut off.
+    
+    :param b: an array of boards
+    :param n: a shift amount
+    :param up: if shifting upward, set true
+    :return: an array of shifted boards
+    '''
+    return b << n if up else b >> n
+
+def to_array(boards) -> np.ndarray:
+    ''' This method converts ints of boards into an array.
+    
+    :param boards: an iterable of ints of boards
+    :return: an array of uint64
+    '''
+    return np.fromiter(boards, dtype=np.uint64)
+
+def to_masks(indices: np.ndarray) -> np.ndarray:
+    ''' This method converts indices of squares into boards.
+    
+    :param indices: an array of indices of squares.  a negative index
+                    means no square.
+    :return: an array of boards whose only one bit is set, or 0
+    '''
+    indices = np.asarray(indices)
+    masks = np.left_shift(np.uint64(1), np.maximum(indices, 0).astype(np.uint64))
+    return np.where(indices >= 0, masks, ZERO)
+
+def count(b: np.ndarray) -> np.ndarray:
+    ''' This method counts discs of boards.
+    
+    :param b: an array of boards
+    :return: an array of the numbers of set bits
+    '''
+    b = b - ((b >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    b = (b & np.uint64(0x3333333333333333)) + ((b >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    b = (b + (b >> np.uint64(4))) & np.uint64(0x0f0f0f0f0f0f0f0f)
+    return ((b * np.uint64(0x0101010101010101)) >> np.uint64(56)).astype(np.int64)
+
+def get_moves(p: np.ndarray, o: np.ndarray) -> np.ndarray:
+    ''' This method finds valid squares of the players on all boards.
+    
+    :param p: an array of boards of the players to move
+    :param o: an array of boards of the opponents
+    :return: an array of boards whose bits indicate valid squares
+    '''
+    empty = ~(p | o)
+    moves = np.zeros_like(p)
+    for n, up, mask in DIRECTIONS:
+        mo = o & mask
+        t = _shift(p, n, up) & mo
+        for i in range(5):
+            t |= _shift(t, n, up) & mo
+        moves |= _shift(t, n, up) & empty
+    return moves
+
+def get_mobility(p: np.ndarray, o: np.ndarray) -> np.ndarray:
+    ''' This method counts valid squares of the players on all boards.
+    
+    :param p: an array of boards of the players to move
+    :param o: an array of boards of the opponents
+    :return: an array of the numbers of valid squares
+    '''
+    return count(get_moves(p, o))
+
+def get_flips(p: np.ndarray, o: np.ndarray, m: np.ndarray) -> np.ndarray:
+    ''' This method finds discs flipped over by a move on each board.
+    
+    :param p: an array of boards of the players to move
+    :param o: an array of boards of the opponents
+    :param m: an array of boards whose only one bit indicates the move.
+              0 means no move.
+    :return: an array of boards of flipped discs
+    '''
+    flips = np.zeros_like(p)
+    for n, up, mask in DIRECTIONS:
+        mo = o & mask
+        t = _shift(m, n, up) & mo
+        for i in range(5):
+            t |= _shift(t, n, up) & mo
+        flips |= np.where(_shift(t, n, up) & p != ZERO, t, ZERO)
+    return flips
+
+def put(p: np.ndarray, o: np.ndarray, m: np.ndarray) -> tuple:
+    ''' This method plays a move on each board.  Boards whose move is 0
+    are not changed.
+    
+    :param p: an array of boards of the players to move
+    :param o: an array of boards of the opponents
+    :param m: an array of boards whose only one bit indicates the move
+    :return: a tuple of arrays of boards of the players and the opponents
+             after the moves
+    '''
+    f = get_flips(p, o, m)
+    return (p | m | f, o & ~f)
+
+def choose(moves: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    ''' This method chooses a random valid square on each board.
+    
+    A random k less than the number of valid squares is drawn for each
+    board, the lowest k bits are cleared and the lowest remaining bit
+    is chosen.
+    
+    :param moves: an array of boards of valid squares
+    :param rng: a random generator
+    :return: an array of boards whose only one bit indicates the chosen
+             square, or 0 if there is no valid square
+    '''
+    k = (rng.random(len(moves)) * count(moves)).astype(np.int64)
+    for i in range(int(k.max(initial=0))):
+        moves = np.where(k > i, moves & (moves - ONE), moves)
+    return moves & (~moves + ONE)
+
+def playout(p: np.ndarray, o: np.ndarray, rng: np.random.Generator = None) -> np.ndarray:
+    ''' This method plays random moves on all boards to the end of games.
+    All games advance a ply at a time and finished games are left as
+    they are.
+    
+    :param p: an array of boards of the players to move
+    :param o: an array of boards of the opponents
+    :param rng: a random generator, or None for a new one
+    :return: an array of final disc differences from the side of the
+             players to move
+    '''
+    if rng is None:
+        rng = np.random.default_rng()
+    sign = np.ones(len(p), dtype=np.int64)
+    passed = np.zeros(len(p), dtype=bool)
+    done = np.zeros(len(p), dtype=bool)
+    while not done.all():
+        moves = get_moves(p, o)
+        none = moves == ZERO
+        done |= none & passed
+        passed = none
+        p, o = put(p, o, choose(moves, rng))
+        p, o = np.where(done, p, o), np.where(done, o, p)
+        sign = np.where(done, sign, -sign)
+    return sign * (count(p) - count(o))
+
+def evaluate(p: int, o: int, playouts: int = 1000, rng: np.random.Generator = None) -> float:
+    ''' This method evaluates a situation by random playouts in a batch.
+    
+    :param p: the board of the player to move
+    :param o: the board of the opponent
+    :param playouts: the number of playouts
+    :param rng: a random generator, or None for a new one
+    :return: the average final disc difference from the side of the player
+    '''
+    ps = np.full(playouts, p, dtype=np.uint64)
+    os = np.full(playouts, o, dtype=np.uint64)
+    return float(playout(ps, os, rng).mean())
+
+def evaluate_moves(p: int, o: int, playouts: int = 1000, rng: np.random.Generator = None) -> dict:
+    ''' This method evaluates each valid move of a situation by random
+    playouts.  Playouts of all moves are played in one batch.
+    
+    :param p: the board of the player to move
+    :param o: the board of the opponent
+    :param playouts: the number of playouts of each move
+    :param rng: a random generator, or None for a new one
+    :return: a dictionary of bits of moves and the average final disc
+             differences from the side of the player
+    '''
+    moves = list(bitboard.iter_masks(bitboard.get_moves(p, o)))
+    if len(moves) == 0:
+        return {}
+    m = np.repeat(to_array(moves), playouts)
+    np_, no = put(np.full(len(m), p, dtype=np.uint64), np.full(len(m), o, dtype=np.uint64), m)
+    results = -playout(no, np_, rng).reshape(len(moves), playouts).mean(axis=1)
+    return dict(zip(moves, results.tolist()))
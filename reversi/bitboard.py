@@ -0,0 +1,387 @@
+# ==========================================================
+# bitboard.py
+# Copyright (C) 2023 Kei Shioda.  All rights reserved.
+# ==========================================================
+''' This module defines bit operations on 64-bit boards.
+
+A board of one color is an int whose bit (y * 8 + x) is set when
+the square at column x and row y (both starting from 0) has a disc.
+Boards of other sizes are handled by Geometry in the same manner,
+where the bit is (y * size + x).
+'''
+from __future__ import annotations
+
+SIZE = 8
+FULL = (1 << (SIZE * SIZE)) - 1
+
+# the largest size of boards.  an index of a square must fit in a byte.
+MAX_SIZE = 14
+
+# columns except the left-most one and the right-most one
+NOT_A_FILE = 0xfefefefefefefefe
+NOT_H_FILE = 0x7f7f7f7f7f7f7f7f
+INNER_FILES = NOT_A_FILE & NOT_H_FILE
+
+# (dx, dy, shift, mask) for each direction.
+# the order is the same as Board.DIRECTIONS.
+# the mask removes discs which would wrap around to the other edge.
+DIRECTIONS = [(1, 0, 1, INNER_FILES),
+              (1, 1, 9, INNER_FILES),
+              (0, 1, 8, FULL),
+              (-1, 1, 7, INNER_FILES),
+              (-1, 0, -1, INNER_FILES),
+              (-1, -1, -9, INNER_FILES),
+              (0, -1, -8, FULL),
+              (1, -1, -7, INNER_FILES)]
+
+def to_bit(x: int, y: int) -> int:
+    ''' This method returns a bit indicating the given square.
+    
+    :param x: x coordinate of the square starting from 0
+    :param y: y coordinate of the square starting from 0
+    :return: an int whose only one bit is set
+    '''
+    return 1 << (y * SIZE + x)
+
+def to_coordinate(index: int) -> tuple:
+    ''' This method converts a bit index into coordinates.
+    
+    :param index: an index of a bit
+    :return: a tuple of x and y coordinates starting from 0
+    '''
+    return (index % SIZE, index // SIZE)
+
+def shift(b: int, n: int) -> int:
+    ''' This method shifts the given board and cuts off the overflow.
+    
+    :param b: a board
+    :param n: a shift amount. positive is upward, negative is downward
+    :return: a shifted board
+    '''
+    if n > 0:
+        return (b << n) & FULL
+    return b >> -n
+
+def count(b: int) -> int:
+    ''' This method counts the number of discs on the given board.
+    
+    :param b: a board
+    :return: the number of set bits
+    '''
+    return b.bit_count()
+
+def iter_bits(b: int):
+    ''' This method yields indices of set bits in ascending order.
+    
+    :param b: a board
+    '''
+    while b:
+        low = b & -b
+        yield low.bit_length() - 1
+        b ^= low
+
+def iter_masks(b: int):
+    ''' This method yields set bits one by one in ascending order.
+    
+    :param b: a board
+    '''
+    while b:
+        low = b & -b
+        yield low
+        b ^= low
+
+def get_moves(p: int, o: int) -> int:
+    ''' This method finds all squares where the player can put a disc.
+    
+    :param p: the board of the player
+    :param o: the board of the opponent
+    :return: a board whose bits indicate valid squares
+    '''
+    empty = ~(p | o) & FULL
+    moves = 0
+    for _, _, n, mask in DIRECTIONS:
+        mo = o & mask
+        if n > 0:
+            t = (p << n) & mo
+            t |= (t << n) & mo
+            t |= (t << n) & mo
+            t |= (t << n) & mo
+            t |= (t << n) & mo
+            t |= (t << n) & mo
+            moves |= (t << n) & empty
+        else:
+            n = -n
+            t = (p >> n) & mo
+            t |= (t >> n) & mo
+            t |= (t >> n) & mo
+            t |= (t >> n) & mo
+            t |= (t >> n) & mo
+            t |= (t >> n) & mo
+            moves |= (t >> n) & empty
+    return moves
+
+def get_flips_in(p: int, o: int, m: int, n: int, mask: int) -> int:
+    ''' This method finds discs flipped over in one direction.
+    
+    :param p: the board of the player
+    :param o: the board of the opponent
+    :param m: a board whose only one bit indicates the putting square
+    :param n: a shift amount of the direction
+    :param mask: a mask of the direction
+    :return: a board of flipped discs
+    '''
+    mo = o & mask
+    f = 0
+    x = shift(m, n)
+    while x & mo:
+        f |= x
+        x = shift(x, n)
+    if x & p:
+        return f
+    return 0
+
+def get_flips(p: int, o: int, m: int) -> int:
+    ''' This method finds all discs flipped over by putting a disc.
+    
+    :param p: the board of the player
+    :param o: the board of the opponent
+    :param m: a board whose only one bit indicates the putting square
+    :return: a board of flipped discs
+    '''
+    flips = 0
+    for _, _, n, mask in DIRECTIONS:
+        flips |= get_flips_in(p, o, m, n, mask)
+    return flips
+
+def flip_vertical(b: int) -> int:
+    ''' This method flips the given board upside down.
+    
+    :param b: a board
+    :return: a flipped board
+    '''
+    return int.from_bytes(b.to_bytes(8, 'little'), 'big')
+
+def mirror_horizontal(b: int) -> int:
+    ''' This method mirrors the given board from left to right.
+    
+    :param b: a board
+    :return: a mirrored board
+    '''
+    b = ((b >> 1) & 0x5555555555555555) | ((b & 0x5555555555555555) << 1)
+    b = ((b >> 2) & 0x3333333333333333) | ((b & 0x3333333333333333) << 2)
+    return ((b >> 4) & 0x0f0f0f0f0f0f0f0f) | ((b & 0x0f0f0f0f0f0f0f0f) << 4)
+
+def flip_diagonal(b: int) -> int:
+    ''' This method flips the given board about the diagonal through
+    (0, 0) and (7, 7), that is, it swaps x and y.
+    
+    :param b: a board
+    :return: a flipped board
+    '''
+    t = 0x0f0f0f0f00000000 & (b ^ (b << 28))
+    b ^= t ^ (t >> 28)
+    t = 0x3333000033330000 & (b ^ (b << 14))
+    b ^= t ^ (t >> 14)
+    t = 0x5500550055005500 & (b ^ (b << 7))
+    b ^= t ^ (t >> 7)
+    return b
+
+def transform(b: int, k: int) -> int:
+    ''' This method applies one of the eight symmetries of the board.
+    
+    :param b: a board
+    :param k: a number of the symmetry from 0 to 7.  0 is the identity.
+    :return: a transformed board
+    '''
+    if k & 4:
+        b = flip_diagonal(b)
+    if k & 1:
+        b = mirror_horizontal(b)
+    if k & 2:
+        b = flip_vertical(b)
+    return b
+
+def get_canonical(p: int, o: int) -> tuple:
+    ''' This method finds the representative of the given situation
+    among its eight symmetries.
+    
+    :param p: the board of the player to move
+    :param o: the board of the opponent
+    :return: a tuple of the transformed boards of the player and the
+             opponent, and the number of the applied symmetry
+    '''
+    best = (p, o, 0)
+    for k in range(1, 8):
+        tp = transform(p, k)
+        to = transform(o, k)
+        if (tp, to) < best[:2]:
+            best = (tp, to, k)
+    return best
+
+class Geometry:
+    ''' This class defines bit operations on boards of a size.
+    
+    Shift amounts and masks of the directions are computed once for each
+    size.  Discs are propagated by doubling shifts, so finding valid
+    squares takes steps of the logarithm of the size.  On the board of
+    SIZE, the functions of this module are called instead, and they are
+    looked up on each call so that replacing them takes effect.
+    '''
+    def __init__(self, size: int) -> Geometry:
+        ''' This method creates an instance.  Use get_geometry to share it.
+        
+        :param size: the number of squares of a side
+        :return: a created instance
+        '''
+        self.size = size
+        self.squares = size * size
+        self.full = (1 << self.squares) - 1
+        first = sum(1 << (y * size) for y in range(size))
+        inner = self.full & ~first & ~(first << (size - 1))
+        self.directions = [(1, 0, 1, inner),
+                           (1, 1, size + 1, inner),
+                           (0, 1, size, self.full),
+                           (-1, 1, size - 1, inner),
+                           (-1, 0, -1, inner),
+                           (-1, -1, -size - 1, inner),
+                           (0, -1, -size, self.full),
+                           (1, -1, -size + 1, inner)]
+        # doubling shifts which cover the longest line of discs, size - 2
+        self.steps = (size - 3).bit_length()
+        
+        # masks of squares from promising ones for ordering of moves
+        last = size - 1
+        corners = self.to_bit(0, 0) | self.to_bit(last, 0) | self.to_bit(0, last) | self.to_bit(last, last)
+        x_squares = (self.to_bit(1, 1) | self.to_bit(last - 1, 1)
+                     | self.to_bit(1, last - 1) | self.to_bit(last - 1, last - 1))
+        c_squares = (self.to_bit(1, 0) | self.to_bit(0, 1) | self.to_bit(last - 1, 0) | self.to_bit(last, 1)
+                     | self.to_bit(0, last - 1) | self.to_bit(1, last)
+                     | self.to_bit(last, last - 1) | self.to_bit(last - 1, last))
+        top = (1 << size) - 1
+        border = top | top << (self.squares - size) | first | first << last
+        edges = border & ~(corners | c_squares)
+        self.order = [corners, edges, self.full & ~(corners | x_squares | c_squares | edges),
+                      c_squares, x_squares]
+    
+    def to_bit(self, x: int, y: int) -> int:
+        ''' This method returns a bit indicating the given square.
+        
+        :param x: x coordinate of the square starting from 0
+        :param y: y coordinate of the square starting from 0
+        :return: an int whose only one bit is set
+        '''
+        return 1 << (y * self.size + x)
+    
+    def to_coordinate(self, index: int) -> tuple:
+        ''' This method converts a bit index into coordinates.
+        
+        :param index: an index of a bit
+        :return: a tuple of x and y coordinates starting from 0
+        '''
+        return (index % self.size, index // self.size)
+    
+    def get_initial(self) -> tuple:
+        ''' This method returns the boards of the initial situation.
+        
+        :return: a tuple of the boards of black and white
+        '''
+        lower = self.size // 2 - 1
+        upper = self.size // 2
+        black = self.to_bit(lower, lower) | self.to_bit(upper, upper)
+        white = self.to_bit(upper, lower) | self.to_bit(lower, upper)
+        return (black, white)
+    
+    def shift(self, b: int, n: int) -> int:
+        ''' This method shifts the given board and cuts off the overflow.
+        
+        :param b: a board
+        :param n: a shift amount. positive is upward, negative is downward
+        :return: a shifted board
+        '''
+        if n > 0:
+            return (b << n) & self.full
+        return b >> -n
+    
+    def get_moves(self, p: int, o: int) -> int:
+        ''' This method finds all squares where the player can put a disc.
+        
+        :param p: the board of the player
+        :param o: the board of the opponent
+        :return: a board whose bits indicate valid squares
+        '''
+        if self.size == SIZE:
+            return get_moves(p, o)
+        empty = ~(p | o) & self.full
+        moves = 0
+        for _, _, n, mask in self.directions:
+            mo = o & mask
+            pro = mo
+            if n > 0:
+                t = (p << n) & mo
+                k = n
+                for i in range(self.steps):
+                    t |= pro & (t << k)
+                    pro &= pro << k
+                    k += k
+                moves |= (t << n) & empty
+            else:
+                n = -n
+                t = (p >> n) & mo
+                k = n
+                for i in range(self.steps):
+                    t |= pro & (t >> k)
+                    pro &= pro >> k
+                    k += k
+                moves |= (t >> n) & empty
+        return moves
+    
+    def get_flips_in(self, p: int, o: int, m: int, n: int, mask: int) -> int:
+        ''' This method finds discs flipped over in one direction.
+        
+        :param p: the board of the player
+        :param o: the board of the opponent
+        :param m: a board whose only one bit indicates the putting square
+        :param n: a shift amount of the direction
+        :param mask: a mask of the direction
+        :return: a board of flipped discs
+        '''
+        mo = o & mask
+        f = 0
+        x = self.shift(m, n)
+        while x & mo:
+            f |= x
+            x = self.shift(x, n)
+        if x & p:
+            return f
+        return 0
+    
+    def get_flips(self, p: int, o: int, m: int) -> int:
+        ''' This method finds all discs flipped over by putting a disc.
+        
+        :param p: the board of the player
+        :param o: the board of the opponent
+        :param m: a board whose only one bit indicates the putting square
+        :return: a board of flipped discs
+        '''
+        if self.size == SIZE:
+            return get_flips(p, o, m)
+        flips = 0
+        for _, _, n, mask in self.directions:
+            flips |= self.get_flips_in(p, o, m, n, mask)
+        return flips
+
+_geometries = {}
+
+def get_geometry(size: int = SIZE) -> Geometry:
+    ''' This method returns the shared geometry of a size.
+    
+    :param size: the number of squares of a side, an even number from 4
+                 to MAX_SIZE
+    :return: a geometry
+    '''
+    geometry = _geometries.get(size)
+    if geometry is None:
+        if size % 2 != 0 or size < 4 or size > MAX_SIZE:
+            raise ValueError("the size of a board must be an even number from 4 to %d" % MAX_SIZE)
+        geometry = _geometries[size] = Geometry(size)
+    return geometry
@@ -0,0 +1,185 @@
+# ==========================================================
+# book.py
+# Copyright (C) 2023 Kei Shioda.  All rights reserved.
+# ==========================================================
+''' This module defines an opening book and its builder.
+
+A book file consists of a header and entries sorted by their keys.
+A key is the canonical form of a situation among its eight symmetries,
+that is, the boards of the player to move and of the opponent.
+An entry has the key, the best move in the canonical form and its score,
+the average final disc difference from the side of the player to move.
+'''
+from __future__ import annotations
+from reversi import bitboard
+import mmap
+import struct
+
+MAGIC = b'RVBK'
+VERSION = 1
+HEADER = struct.Struct('>4sHHQ')
+ENTRY = struct.Struct('>QQBh')
+KEY_SIZE = 16
+
+# the initial situation of Board from the side of the black player
+INITIAL = (0x0000001008000000, 0x0000000810000000)
+
+class OpeningBook:
+    ''' This class looks up book moves in a memory-mapped book file.
+    
+    The file is not parsed when it is opened.  A lookup is a binary search
+    over the mapped pages, which are shared by processes using the same
+    file.
+    '''
+    def __init__(self, path: str) -> OpeningBook:
+        ''' This method opens a book file.
+        
+        :param path: a path of the book file
+        :return: a created instance
+        '''
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError(path + " is not a book file")
+        self.count = count
+    
+    def __len__(self) -> int:
+        ''' This method returns the number of entries.
+        
+        :return: the number of entries
+        '''
+        return self.count
+    
+    def close(self) -> None:
+        ''' This method closes the book file.
+        '''
+        self.map.close()
+    
+    def lookup(self, p: int, o: int) -> tuple:
+        ''' This method finds the book move of a situation.
+        
+        :param p: the board of the player to move
+        :param o: the board of the opponent
+        :return: a tuple of the bit of the move and its score,
+                 or None if the situation is not in the book
+        '''
+        cp, co, k = bitboard.get_canonical(p, o)
+        entry = self._find(struct.pack('>QQ', cp, co))
+        if entry is None:
+            return None
+        
+        _, _, move, score = entry
+        for m in bitboard.iter_masks(bitboard.get_moves(p, o)):
+            if bitboard.transform(m, k) == 1 << move:
+                return (m, score)
+        return None
+    
+    def _find(self, key: bytes) -> tuple:
+        ''' This method searches an entry of the given key.
+        
+        :param key: a packed canonical key
+        :return: an unpacked entry, or None if there is no entry
+        '''
+        lower = 0
+        upper = self.count
+        while lower < upper:
+            middle = (lower + upper) // 2
+            offset = HEADER.size + middle * ENTRY.size
+            k = self.map[offset:offset + KEY_SIZE]
+            if k < key:
+                lower = middle + 1
+            elif k > key:
+                upper = middle
+            else:
+                return ENTRY.unpack_from(self.map, offset)
+        return None
+    
+    def entries(self):
+        ''' This method yields all entries in the order of keys.
+        '''
+        for i in range(self.count):
+            yield ENTRY.unpack_from(self.map, HEADER.size + i * ENTRY.size)
+
+class BookBuilder:
+    ''' This class builds a book file from records of games.
+    
+    Each situation of the first plies of the games counts final results
+    of moves played there.  The move with the best average result is
+    written in the book.
+    '''
+    def __init__(self, max_plies: int = 20, min_games: int = 2) -> BookBuilder:
+        ''' This method creates an instance.
+        
+        :param max_plies: situations up to this number of plies are stored
+        :param min_games: moves played less than this number are ignored
+        :return: a created instance
+        '''
+        self.max_plies = max_plies
+        self.min_games = min_games
+        self.stats = {}
+    
+    def add_game(self, moves) -> bool:
+        ''' This method adds a game to the statistics.
+        
+        :param moves: square indices of moves from the initial situation.
+                      a pass is None.
+        :return: if all moves are valid, return true,
+                 otherwise, the game is ignored and return false
+        '''
+        p, o = INITIAL
+        black = True
+        visited = []
+        for ply, index in enumerate(moves):
+            if index is not None:
+                m = 1 << index
+                f = bitboard.get_flips(p, o, m)
+                if f == 0 or m & (p | o):
+                    return False
+                if ply < self.max_plies:
+                    cp, co, k = bitboard.get_canonical(p, o)
+                    visited.append((cp, co, bitboard.transform(m, k).bit_length() - 1, black))
+                p, o = p | m | f, o & ~f
+            p, o = o, p
+            black = not black
+        
+        diff = p.bit_count() - o.bit_count()
+        if not black:
+            diff = -diff
+        for cp, co, move, is_black in visited:
+            counts = self.stats.setdefault((cp, co), {})
+            n, total = counts.get(move, (0, 0))
+            counts[move] = (n + 1, total + (diff if is_black else -diff))
+        return True
+    
+    def write(self, path: str, base: OpeningBook = None) -> int:
+        ''' This method writes a book file.
+        
+        :param path: a path of the book file
+        :param base: a book whose entries are kept unless the statistics
+                     have the same situations
+        :return: the number of written entries
+        '''
+        entries = {}
+        if base is not None:
+            for p, o, move, score in base.entries():
+                entries[(p, o)] = (move, score)
+        
+        for key, counts in self.stats.items():
+            best = None
+            for move, (n, total) in counts.items():
+                if n < self.min_games:
+                    continue
+                score = total / n
+                if best is None or score > best[1]:
+                    best = (move, score)
+            if best is not None:
+                entries[key] = (best[0], round(best[1]))
+        
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, 0, len(entries)))
+            for key in sorted(entries):
+                move, score = entries[key]
+                f.write(ENTRY.pack(key[0], key[1], move, score))
+        return len(entries)
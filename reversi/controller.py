@@ -5,28 +5,58 @@
 ''' This module defines controllers.
 '''
 from reversi.view import MainMenuView, ConfigView, GameView, ResultView, ErrorView
-from reversi.model import State, Color, Game, Player, Opponent
+from reversi.model import State, Color, Board, Game, Player, Opponent
+from reversi.book import OpeningBook
+from reversi.ponder import Ponderer
+from reversi import instrument
 import time
 
 class Controller:
     ''' This class controlls contents of screen and manipulates items 
     of the model module.
     '''
+    # seconds the opponent player thinks for a move
     DURATION_TIME = 1
+    # a path of the opening book file of the opponent player, or None
+    BOOK_PATH = None
+    # a path of the weight file of the pattern evaluation, or None
+    WEIGHTS_PATH = None
+    # the engine of the opponent player, "search" or "mcts"
+    ENGINE = "search"
+    # the number of squares of a side of the board, an even number
+    BOARD_SIZE = 8
+    # the number of processes the opponent player searches with
+    WORKERS = 1
+    # if true, the opponent player thinks during the user's turn
+    PONDER = True
+    # a path of the metrics file, or None to disable instrumentation
+    METRICS_PATH = None
     
-    def __init__(self):
+    def __init__(self, metrics_path: str = None):
         ''' This is a constructer of the Controller class.
+        
+        :param metrics_path: a path of the metrics file.
+                             if None, METRICS_PATH is used.
         '''
         self.mainmenuview = MainMenuView()
         self.configview = ConfigView()
         self.errorview = ErrorView()
         self.state = State.START
+        self.book = OpeningBook(self.BOOK_PATH) if self.BOOK_PATH is not None else None
+        if metrics_path is None:
+            metrics_path = self.METRICS_PATH
+        self.recorder = instrument.Recorder(metrics_path) if metrics_path is not None else None
     
     def start(self) -> None:
         ''' This method takes actions according to the current state.
         '''
         self.state = State.MAINMENU
+        if self.recorder is not None:
+            instrument.enable_counters()
         while self.state is not State.EXIT:
+            if self.recorder is not None:
+                state = self.state
+                begin = time.perf_counter()
             match self.state:
                 case State.MAINMENU:
                     self.state = self._do_mainmenu_case()
@@ -44,6 +74,15 @@ class Controller:
                     break
                 case _:
                     self.state = self._do_error_case()
+            if self.recorder is not None:
+                self.recorder.record("state", state=state.name, next=self.state.name,
+                                     seconds=time.perf_counter() - begin)
+        if self.recorder is not None:
+            self.recorder.record("counters", **instrument.get_counters())
+            self.recorder.record("move_cache", hits=Board.move_cache.hits, misses=Board.move_cache.misses,
+                                 entries=len(Board.move_cache))
+            instrument.disable_counters()
+            self.recorder.close()
         print("Good bye!")
     
     def _do_mainmenu_case(self) -> State:
@@ -71,9 +110,13 @@ class Controller:
                 return State.ERROR
     
     def _make_game(self) -> State:
-        self.game = Game()
+        self.game = Game(self.BOARD_SIZE)
         self.user = Player(self.game, self.usercolor)
-        self.opponent = Opponent(self.game, Color.get_opponent(self.usercolor))
+        self.opponent = Opponent(self.game, Color.get_opponent(self.usercolor), self.DURATION_TIME,
+                                 book=self.book, workers=self.WORKERS, weights=self.WEIGHTS_PATH,
+                                 engine=self.ENGINE)
+        self.opponent.recorder = self.recorder
+        self.ponderer = Ponderer(self.opponent) if self.PONDER and self.ENGINE == "search" else None
         self.gameview = GameView(self.game)
         self.resultview = ResultView(self.game)
         
@@ -81,12 +124,22 @@ class Controller:
     
     def _do_user_turn(self) -> State:
         self.gameview.output(self.usercolor, True)
+        if self.ponderer is not None:
+            self.ponderer.start(self.game.board, self.usercolor)
+        try:
+            return self._get_user_action()
+        finally:
+            if self.ponderer is not None:
+                self.ponderer.stop()
+    
+    def _get_user_action(self) -> State:
         while True:
             s = self.gameview.input()
             match s.split(",")[0]:
                 case "PUT":
                     c, x, y = s.split(",")
-                    if int(x) > 0 and int(x) < 9 and int(y) > 0 and int(y) < 9 and self.user.put_disc(int(x), int(y)):
+                    size = self.game.board.size
+                    if 0 < int(x) <= size and 0 < int(y) <= size and self.user.put_disc(int(x), int(y)):
                         return State.OPPONENT
                     else:
                         self.errorview.output(1)
@@ -101,13 +154,18 @@ class Controller:
                 case "SURRENDER":
                     self.user.surrender(True)
                     return State.RESULT
+                case "UNDO":
+                    if self.user.undo():
+                        return State.USER
+                    else:
+                        self.errorview.output(4)
                 case _:
                     return State.ERRROR
     
     def _do_opponent_turn(self) -> State:
         self.gameview.output(Color.get_opponent(self.usercolor), False)
-        time.sleep(self.DURATION_TIME)
-        if self.opponent.move():
+        pondered = self.ponderer.get(self.game.board) if self.ponderer is not None else 0
+        if self.opponent.move(pondered):
             return State.USER
         else:
             if self.game.is_finished():
@@ -117,6 +175,7 @@ class Controller:
                 
     
     def _do_result_case(self) -> State:
+        self.opponent.close()
         self.resultview.output()
         self.resultview.input()
         return State.MAINMENU
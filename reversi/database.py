@@ -0,0 +1,244 @@
+# ==========================================================
+# database.py
+# Copyright (C) 2023 Kei Shioda.  All rights reserved.
+# ==========================================================
+''' This module defines a database of statistics of situations.
+
+A database file consists of a header and entries sorted by their keys
+as same as a book file.  A key is the canonical form of a situation,
+the boards of the player to move and of the opponent.  An entry has
+the key and the numbers of games the player to move won, drew and lost
+from the situation.
+
+Entries are collected in memory up to a limit and spilled to sorted
+runs in temporary files, which are merged into the database file, so
+the memory used does not depend on the size of the database.
+'''
+from __future__ import annotations
+from reversi import bitboard
+from reversi.book import INITIAL
+from reversi.model import Color
+from reversi import record
+import heapq
+import mmap
+import struct
+import tempfile
+
+MAGIC = b'RVDB'
+VERSION = 1
+HEADER = struct.Struct('>4sHHQ')
+ENTRY = struct.Struct('>QQIII')
+KEY_SIZE = 16
+
+class PositionDatabase:
+    ''' This class looks up statistics of situations in a memory-mapped
+    database file.
+    '''
+    def __init__(self, path: str) -> PositionDatabase:
+        ''' This method opens a database file.
+        
+        :param path: a path of the database file
+        :return: a created instance
+        '''
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError(path + " is not a database file")
+        self.count = count
+    
+    def __len__(self) -> int:
+        ''' This method returns the number of entries.
+        
+        :return: the number of entries
+        '''
+        return self.count
+    
+    def close(self) -> None:
+        ''' This method closes the database file.
+        '''
+        self.map.close()
+    
+    def lookup(self, p: int, o: int) -> tuple:
+        ''' This method finds statistics of a situation.
+        
+        :param p: the board of the player to move
+        :param o: the board of the opponent
+        :return: a tuple of the numbers of games the player won, drew
+                 and lost, or None if the situation is not stored
+        '''
+        cp, co, _ = bitboard.get_canonical(p, o)
+        key = struct.pack('>QQ', cp, co)
+        lower = 0
+        upper = self.count
+        while lower < upper:
+            middle = (lower + upper) // 2
+            offset = HEADER.size + middle * ENTRY.size
+            k = self.map[offset:offset + KEY_SIZE]
+            if k < key:
+                lower = middle + 1
+            elif k > key:
+                upper = middle
+            else:
+                return ENTRY.unpack_from(self.map, offset)[2:]
+        return None
+    
+    def get_best_move(self, p: int, o: int) -> tuple:
+        ''' This method finds the best known move of a situation, whose
+        next situation has the best score for the player to move.
+        The score is the ratio of wins plus half of draws.
+        
+        :param p: the board of the player to move
+        :param o: the board of the opponent
+        :return: a tuple of the bit of the move, its score and the number
+                 of games, or None if no next situation is stored
+        '''
+        best = None
+        for m in bitboard.iter_masks(bitboard.get_moves(p, o)):
+            f = bitboard.get_flips(p, o, m)
+            stats = self.lookup(o & ~f, p | m | f)
+            if stats is None:
+                continue
+            lose, draw, win = stats
+            n = win + draw + lose
+            score = (win + draw / 2) / n
+            if best is None or score > best[1]:
+                best = (m, score, n)
+        return best
+    
+    def entries(self):
+        ''' This method yields all entries in the order of keys.
+        '''
+        for i in range(self.count):
+            yield ENTRY.unpack_from(self.map, HEADER.size + i * ENTRY.size)
+
+class DatabaseBuilder:
+    ''' This class builds a database file from records of games.
+    
+    Statistics are counted in a dictionary until it has max_entries
+    entries.  Then they are written to a sorted run in a temporary file.
+    '''
+    def __init__(self, max_entries: int = 1 << 20) -> DatabaseBuilder:
+        ''' This method creates an instance.
+        
+        :param max_entries: the number of entries kept in memory
+        :return: a created instance
+        '''
+        self.max_entries = max_entries
+        self.stats = {}
+        self.runs = []
+    
+    def add_game(self, moves, winner: Color = None) -> bool:
+        ''' This method adds all situations of a game to the statistics.
+        
+        :param moves: square indices of moves from the initial situation.
+                      a pass is None.
+        :param winner: the color of the winner, NONE for a draw,
+                       or None to decide it by the numbers of discs
+        :return: if all moves are valid, return true,
+                 otherwise, the game is ignored and return false
+        '''
+        p, o = INITIAL
+        black = True
+        visited = []
+        for index in moves:
+            visited.append(bitboard.get_canonical(p, o)[:2] + (black,))
+            if index is not None:
+                m = 1 << index
+                f = bitboard.get_flips(p, o, m)
+                if f == 0 or m & (p | o):
+                    return False
+                p, o = p | m | f, o & ~f
+            p, o = o, p
+            black = not black
+        visited.append(bitboard.get_canonical(p, o)[:2] + (black,))
+        # two passes return to the same situation, which is counted once
+        visited = dict.fromkeys(visited)
+        
+        if winner is None:
+            diff = p.bit_count() - o.bit_count()
+            if not black:
+                diff = -diff
+            winner = Color.BLACK if diff > 0 else Color.WHITE if diff < 0 else Color.NONE
+        for cp, co, is_black in visited:
+            win, draw, lose = self.stats.get((cp, co), (0, 0, 0))
+            if winner is Color.NONE:
+                draw += 1
+            elif (winner is Color.BLACK) == is_black:
+                win += 1
+            else:
+                lose += 1
+            self.stats[(cp, co)] = (win, draw, lose)
+        
+        if len(self.stats) >= self.max_entries:
+            self._spill()
+        return True
+    
+    def add_records(self, path: str) -> int:
+        ''' This method adds all games of a record file.
+        
+        :param path: a path of the record file
+        :return: the number of added games
+        '''
+        n = 0
+        for r in record.read(path):
+            if self.add_game(r["moves"], r["winner"]):
+                n += 1
+        return n
+    
+    def write(self, path: str, base: PositionDatabase = None) -> int:
+        ''' This method writes a database file.
+        
+        :param path: a path of the database file
+        :param base: a database whose statistics are added
+        :return: the number of written entries
+        '''
+        self._spill()
+        sources = [self._read_run(run) for run in self.runs]
+        if base is not None:
+            sources.append(base.entries())
+        
+        count = 0
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, 0, 0))
+            last = None
+            for entry in heapq.merge(*sources):
+                if last is not None and entry[:2] == last[:2]:
+                    last = last[:2] + tuple(a + b for a, b in zip(last[2:], entry[2:]))
+                    continue
+                if last is not None:
+                    f.write(ENTRY.pack(*last))
+                    count += 1
+                last = entry
+            if last is not None:
+                f.write(ENTRY.pack(*last))
+                count += 1
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, VERSION, 0, count))
+        
+        for run in self.runs:
+            run.close()
+        self.runs = []
+        return count
+    
+    def _spill(self) -> None:
+        ''' This method writes the statistics in memory to a sorted run.
+        '''
+        if len(self.stats) == 0:
+            return
+        run = tempfile.TemporaryFile()
+        for key in sorted(self.stats):
+            run.write(ENTRY.pack(key[0], key[1], *self.stats[key]))
+        self.stats = {}
+        self.runs.append(run)
+    
+    def _read_run(self, run):
+        ''' This method yields entries of a sorted run.
+        
+        :param run: a temporary file of the run
+        '''
+        run.seek(0)
+        while data := run.read(ENTRY.size * 4096):
+            for entry in ENTRY.iter_unpack(data):
+                yield entry
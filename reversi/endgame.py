@@ -0,0 +1,214 @@
+# ==========================================================
+# endgame.py
+# Copyright (C) 2023 Kei Shioda.  All rights reserved.
+# ==========================================================
+''' This module defines an exact solver of endgames.
+
+A score of the solver is the final difference of the numbers of
+discs, the player's minus the opponent's, under perfect play.
+'''
+from __future__ import annotations
+from reversi import bitboard
+import time
+
+# the four quadrants of the board
+QUADRANTS = [0x000000000f0f0f0f, 0x00000000f0f0f0f0,
+             0x0f0f0f0f00000000, 0xf0f0f0f000000000]
+
+class EndgameSolver:
+    ''' This class solves endgames by negamax with alpha-beta pruning.
+    
+    Moves in quadrants with an odd number of empty squares are tried
+    first (parity ordering).  Positions with four or fewer empty squares
+    are solved by special routines which try the empty squares directly
+    instead of generating moves.
+    '''
+    FASTEST_FIRST_EMPTIES = 7
+    SMALL_EMPTIES = 4
+    
+    def __init__(self) -> EndgameSolver:
+        ''' This method creates an instance.
+        
+        :return: a created instance
+        '''
+        self.nodes = 0
+        self.elapsed = 0.0
+    
+    def get_nps(self) -> float:
+        ''' This method computes nodes per second of the last solve.
+        
+        :return: the number of nodes per second
+        '''
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+    
+    def solve(self, p: int, o: int, alpha: int = -64, beta: int = 64) -> int:
+        ''' This method computes the exact score of a situation.
+        
+        :param p: the board of the player to move
+        :param o: the board of the opponent
+        :param alpha: the lower bound of the window
+        :param beta: the upper bound of the window
+        :return: the score if it is within the window, otherwise a bound
+        '''
+        start = time.perf_counter()
+        self.nodes = 0
+        score = self._solve(p, o, alpha, beta, False)
+        self.elapsed = time.perf_counter() - start
+        return score
+    
+    def solve_wld(self, p: int, o: int) -> int:
+        ''' This method finds only whether the player wins, loses or draws
+        by a null-window search.
+        
+        :param p: the board of the player to move
+        :param o: the board of the opponent
+        :return: 1 if the player wins, -1 if he loses, 0 if it is a draw
+        '''
+        score = self.solve(p, o, -1, 1)
+        return (score > 0) - (score < 0)
+    
+    def solve_move(self, p: int, o: int) -> tuple:
+        ''' This method finds the best move and its exact score.
+        
+        :param p: the board of the player to move
+        :param o: the board of the opponent
+        :return: a tuple of the bit of the best move (0 if the player
+                 must pass) and the exact score
+        '''
+        start = time.perf_counter()
+        self.nodes = 0
+        moves = bitboard.get_moves(p, o)
+        if moves == 0:
+            score = self._solve(p, o, -64, 64, False)
+            self.elapsed = time.perf_counter() - start
+            return (0, score)
+        
+        best = 0
+        alpha = -65
+        for m in self._ordered(p, o, moves):
+            f = bitboard.get_flips(p, o, m)
+            score = -self._solve(o & ~f, p | m | f, -64, -alpha, False)
+            if score > alpha:
+                alpha = score
+                best = m
+        self.elapsed = time.perf_counter() - start
+        return (best, alpha)
+    
+    def _ordered(self, p: int, o: int, moves: int) -> list:
+        ''' This method orders moves by parity and, when many squares are
+        empty, by the opponent's mobility (fastest-first).
+        
+        :param p: the board of the player to move
+        :param o: the board of the opponent
+        :param moves: a board of valid squares
+        :return: a list of bits of moves
+        '''
+        empty = ~(p | o) & bitboard.FULL
+        odd = 0
+        for q in QUADRANTS:
+            if (empty & q).bit_count() & 1:
+                odd |= q
+        
+        if empty.bit_count() <= self.FASTEST_FIRST_EMPTIES:
+            return list(bitboard.iter_masks(moves & odd)) + list(bitboard.iter_masks(moves & ~odd))
+        
+        keyed = []
+        for m in bitboard.iter_masks(moves):
+            f = bitboard.get_flips(p, o, m)
+            mobility = bitboard.get_moves(o & ~f, p | m | f).bit_count()
+            keyed.append((mobility - (2 if m & odd else 0), m))
+        keyed.sort()
+        return [m for _, m in keyed]
+    
+    def _solve(self, p: int, o: int, alpha: int, beta: int, passed: bool) -> int:
+        ''' This method computes the score by negamax with alpha-beta pruning.
+        
+        :param p: the board of the player to move
+        :param o: the board of the opponent
+        :param alpha: the lower bound of the window
+        :param beta: the upper bound of the window
+        :param passed: if the previous turn was passed, set true
+        :return: the score if it is within the window, otherwise a bound
+        '''
+        empty = ~(p | o) & bitboard.FULL
+        if empty.bit_count() <= self.SMALL_EMPTIES:
+            return self._solve_small(p, o, alpha, beta, empty, passed)
+        
+        self.nodes += 1
+        moves = bitboard.get_moves(p, o)
+        if moves == 0:
+            if passed:
+                return p.bit_count() - o.bit_count()
+            return -self._solve(o, p, -beta, -alpha, True)
+        
+        best = -65
+        for m in self._ordered(p, o, moves):
+            f = bitboard.get_flips(p, o, m)
+            score = -self._solve(o & ~f, p | m | f, -beta, -alpha, False)
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best
+    
+    def _solve_small(self, p: int, o: int, alpha: int, beta: int, empty: int,
+                     passed: bool = False) -> int:
+        ''' This method solves a situation with four or fewer empty squares
+        by trying each empty square directly.
+        
+        :param p: the board of the player to move
+        :param o: the board of the opponent
+        :param alpha: the lower bound of the window
+        :param beta: the upper bound of the window
+        :param empty: a board of empty squares
+        :param passed: if the previous turn was passed, set true
+        :return: the score if it is within the window, otherwise a bound
+        '''
+        self.nodes += 1
+        if empty == 0:
+            return p.bit_count() - o.bit_count()
+        if empty & (empty - 1) == 0:
+            return self._solve_last(p, o, empty)
+        
+        odd = 0
+        for q in QUADRANTS:
+            if (empty & q).bit_count() & 1:
+                odd |= q
+        squares = list(bitboard.iter_masks(empty & odd)) + list(bitboard.iter_masks(empty & ~odd))
+        
+        best = -65
+        for m in squares:
+            f = bitboard.get_flips(p, o, m)
+            if f:
+                score = -self._solve_small(o & ~f, p | m | f, -beta, -alpha, empty ^ m)
+                if score > best:
+                    best = score
+                    if score > alpha:
+                        alpha = score
+                        if alpha >= beta:
+                            return best
+        if best > -65:
+            return best
+        if passed:
+            return p.bit_count() - o.bit_count()
+        return -self._solve_small(o, p, -beta, -alpha, empty, True)
+    
+    def _solve_last(self, p: int, o: int, m: int) -> int:
+        ''' This method solves a situation with only one empty square.
+        
+        :param p: the board of the player to move
+        :param o: the board of the opponent
+        :param m: a bit of the empty square
+        :return: the exact score
+        '''
+        n = p.bit_count()
+        f = bitboard.get_flips(p, o, m).bit_count()
+        if f:
+            return 2 * (n + f + 1) - 64
+        
+        f = bitboard.get_flips(o, p, m).bit_count()
+        if f:
+            return 2 * (n - f) - 64
+        return 2 * n - 63
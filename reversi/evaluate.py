@@ -0,0 +1,349 @@
+# ==========================================================
+# evaluate.py
+# Copyright (C) 2023 Kei Shioda.  All rights reserved.
+# ==========================================================
+''' This module defines evaluation functions of board situations.
+'''
+from __future__ import annotations
+from reversi import bitboard
+from array import array
+import operator
+import struct
+import sys
+
+class Evaluator:
+    ''' This class evaluates a board situation by weights of squares
+    and mobility.
+    
+    Weights of squares of other sizes than 8 follow the same rules as
+    WEIGHTS by the distances from the edges and the corners.  The size
+    follows the board given by reset.
+    '''
+    WEIGHTS = [[100, -20, 10,  5,  5, 10, -20, 100],
+               [-20, -50, -2, -2, -2, -2, -50, -20],
+               [ 10,  -2, -1, -1, -1, -1,  -2,  10],
+               [  5,  -2, -1, -1, -1, -1,  -2,   5],
+               [  5,  -2, -1, -1, -1, -1,  -2,   5],
+               [ 10,  -2, -1, -1, -1, -1,  -2,  10],
+               [-20, -50, -2, -2, -2, -2, -50, -20],
+               [100, -20, 10,  5,  5, 10, -20, 100]]
+    MOBILITY_WEIGHT = 10
+    
+    def __init__(self, size: int = bitboard.SIZE) -> Evaluator:
+        ''' This method creates an instance.
+        
+        :param size: the number of squares of a side of boards
+        :return: a created instance
+        '''
+        self._set_size(size)
+    
+    def _set_size(self, size: int) -> None:
+        ''' This method makes masks of squares of each weight for a size.
+        
+        :param size: the number of squares of a side of boards
+        '''
+        self.geometry = bitboard.get_geometry(size)
+        weights = self.WEIGHTS if size == len(self.WEIGHTS) else self._get_weights(size)
+        masks = {}
+        for y in range(size):
+            for x in range(size):
+                w = weights[y][x]
+                masks[w] = masks.get(w, 0) | self.geometry.to_bit(x, y)
+        self.masks = list(masks.items())
+    
+    @staticmethod
+    def _get_weights(size: int) -> list:
+        ''' This method makes weights of squares of a size.
+        
+        :param size: the number of squares of a side of boards
+        :return: a list of rows of weights
+        '''
+        edge = {0: 100, 1: -20, 2: 10}
+        weights = []
+        for y in range(size):
+            row = []
+            for x in range(size):
+                near, far = sorted((min(x, size - 1 - x), min(y, size - 1 - y)))
+                if near == 0:
+                    row.append(edge.get(far, 5))
+                elif near == 1:
+                    row.append(-50 if far == 1 else -2)
+                else:
+                    row.append(-1)
+            weights.append(row)
+        return weights
+    
+    def evaluate(self, p: int, o: int) -> int:
+        ''' This method evaluates a board situation from the player's side.
+        
+        :param p: the board of the player
+        :param o: the board of the opponent
+        :return: a score.  the larger it is, the better for the player
+        '''
+        score = 0
+        for w, mask in self.masks:
+            score += w * ((p & mask).bit_count() - (o & mask).bit_count())
+        
+        get_moves = self.geometry.get_moves
+        mobility = get_moves(p, o).bit_count() - get_moves(o, p).bit_count()
+        return score + self.MOBILITY_WEIGHT * mobility
+    
+    def copy(self) -> Evaluator:
+        ''' This method returns an evaluator for another search.
+        
+        :return: this instance, which has no state of a search
+        '''
+        return self
+    
+    def reset(self, board) -> None:
+        ''' This method is called when a search of the board starts.
+        
+        :param board: the board of the root node
+        '''
+        if board.size != self.geometry.size:
+            self._set_size(board.size)
+    
+    def push(self, record: tuple) -> None:
+        ''' This method is called after a move or a pass in a search.
+        
+        :param record: the record returned by Board.put or Board.pass_move
+        '''
+        pass
+    
+    def pop(self, record: tuple) -> None:
+        ''' This method is called before the move or the pass is taken back.
+        
+        :param record: the record of the move or the pass
+        '''
+        pass
+
+# (name, squares) of patterns.  a square is (x, y).
+PATTERNS = [("edge", [(0, 0), (1, 0), (2, 0), (3, 0), (4, 0), (5, 0), (6, 0), (7, 0)]),
+            ("corner", [(0, 0), (1, 0), (2, 0), (0, 1), (1, 1), (2, 1), (0, 2), (1, 2), (2, 2)]),
+            ("corner2x5", [(0, 0), (1, 0), (2, 0), (3, 0), (4, 0), (0, 1), (1, 1), (2, 1), (3, 1), (4, 1)]),
+            ("diagonal8", [(i, i) for i in range(8)]),
+            ("diagonal7", [(i + 1, i) for i in range(7)]),
+            ("diagonal6", [(i + 2, i) for i in range(6)]),
+            ("diagonal5", [(i + 3, i) for i in range(5)]),
+            ("diagonal4", [(i + 4, i) for i in range(4)])]
+
+class PatternEvaluator(Evaluator):
+    ''' This class evaluates a board situation by weight tables of
+    patterns of squares.
+    
+    Each pattern and its symmetric images read their squares as a ternary
+    code, 0 for an empty square, 1 for a black disc and 2 for a white disc.
+    The codes are updated by push and pop of a search, so evaluate only
+    sums up a weight for each code.  Its arguments must be the situation
+    given by reset, push and pop.
+    Weight tables are arrays of int per phase, which is decided by
+    the number of empty squares.  Weights are scores of the player to
+    move, 1 for his disc and 2 for the opponent's one.  Trained weights
+    are in units of Searcher.DISC_SCORE per disc of the final result,
+    while the default ones keep the units of the weights of squares of
+    Evaluator, without mobility.
+    '''
+    PHASES = 6
+    EMPTIES_PER_PHASE = 10
+    
+    MAGIC = b'RVEW'
+    VERSION = 1
+    HEADER = struct.Struct('>4sHH')
+    
+    def __init__(self, weights: list = None) -> PatternEvaluator:
+        ''' This method creates an instance.
+        
+        :param weights: a list of weights of each phase, a list of arrays
+                        of each pattern in PATTERNS.  if None, weights
+                        are made from the weights of squares of Evaluator.
+        :return: a created instance
+        '''
+        super().__init__()
+        
+        # instances of patterns and the index of the pattern of each instance
+        self.instances = []
+        self.kinds = kinds = []
+        for kind, (name, squares) in enumerate(PATTERNS):
+            found = set()
+            for k in range(8):
+                image = [bitboard.transform(bitboard.to_bit(x, y), k).bit_length() - 1 for x, y in squares]
+                if frozenset(image) not in found:
+                    found.add(frozenset(image))
+                    self.instances.append(image)
+                    kinds.append(kind)
+        if weights is None:
+            weights = self._get_default_weights()
+        self.weights = weights
+        
+        # (instance, change of its code) of each square for each color
+        self.places = ([[] for i in range(64)], [[] for i in range(64)])
+        self.flips = ([[] for i in range(64)], [[] for i in range(64)])
+        for i, image in enumerate(self.instances):
+            for j, k in enumerate(image):
+                power = 3 ** j
+                self.places[0][k].append((i, power))
+                self.places[1][k].append((i, 2 * power))
+                self.flips[0][k].append((i, -power))
+                self.flips[1][k].append((i, power))
+        
+        # tables of each instance for each side to move and phase
+        self.tables = ([], [])
+        for phase in weights:
+            swapped = [array('i', (w[s] for s in self._get_swap(len(w)))) for w in phase]
+            self.tables[0].append([phase[kind] for kind in kinds])
+            self.tables[1].append([swapped[kind] for kind in kinds])
+        self.codes = [0] * len(self.instances)
+        self.side = 0
+    
+    @classmethod
+    def load(cls, path: str) -> PatternEvaluator:
+        ''' This method creates an instance with weights in a file.
+        
+        :param path: a path of the weight file
+        :return: a created instance
+        '''
+        with open(path, 'rb') as f:
+            magic, version, phases = cls.HEADER.unpack(f.read(cls.HEADER.size))
+            if magic != cls.MAGIC or version != cls.VERSION or phases != cls.PHASES:
+                raise ValueError(path + " is not a weight file")
+            weights = []
+            for phase in range(phases):
+                weights.append([])
+                for name, squares in PATTERNS:
+                    w = array('i')
+                    w.fromfile(f, 3 ** len(squares))
+                    if sys.byteorder == 'big':
+                        w.byteswap()
+                    weights[-1].append(w)
+        return cls(weights)
+    
+    def save(self, path: str) -> None:
+        ''' This method writes the weights to a file.  Weights are written
+        in little endian.
+        
+        :param path: a path of the weight file
+        '''
+        with open(path, 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSION, self.PHASES))
+            for phase in self.weights:
+                for w in phase:
+                    if sys.byteorder == 'big':
+                        w = array('i', w)
+                        w.byteswap()
+                    w.tofile(f)
+    
+    def copy(self) -> PatternEvaluator:
+        ''' This method returns an evaluator for another search.  The tables
+        are shared.
+        
+        :return: a created instance
+        '''
+        evaluator = PatternEvaluator.__new__(PatternEvaluator)
+        evaluator.__dict__.update(self.__dict__)
+        evaluator.codes = list(self.codes)
+        return evaluator
+    
+    def reset(self, board) -> None:
+        ''' This method computes the codes of a board.
+        
+        :param board: the board of the root node
+        '''
+        if board.size != bitboard.SIZE:
+            raise ValueError("patterns are of 8x8 boards")
+        for i, image in enumerate(self.instances):
+            code = 0
+            for j, k in enumerate(image):
+                if board.black >> k & 1:
+                    code += 3 ** j
+                elif board.white >> k & 1:
+                    code += 2 * 3 ** j
+            self.codes[i] = code
+        self.side = board.side.value
+    
+    def push(self, record: tuple) -> None:
+        ''' This method updates the codes by a move or a pass.
+        
+        :param record: the record returned by Board.put or Board.pass_move
+        '''
+        m, f, c = record
+        c = c.value
+        self.side = 1 - c
+        if m:
+            self._update(m, f, c, 1)
+    
+    def pop(self, record: tuple) -> None:
+        ''' This method updates the codes before a move or a pass is taken back.
+        
+        :param record: the record of the move or the pass
+        '''
+        m, f, c = record
+        c = c.value
+        self.side = c
+        if m:
+            self._update(m, f, c, -1)
+    
+    def _update(self, m: int, f: int, c: int, sign: int) -> None:
+        ''' This method changes the codes of squares of a move.
+        
+        :param m: a bit of the move
+        :param f: bits of flipped discs
+        :param c: the value of the color of the player
+        :param sign: 1 to put the discs, -1 to take them back
+        '''
+        codes = self.codes
+        for i, d in self.places[c][m.bit_length() - 1]:
+            codes[i] += sign * d
+        flips = self.flips[c]
+        while f:
+            b = f & -f
+            for i, d in flips[b.bit_length() - 1]:
+                codes[i] += sign * d
+            f ^= b
+    
+    def evaluate(self, p: int, o: int) -> int:
+        ''' This method evaluates a board situation from the player's side.
+        
+        :param p: the board of the player
+        :param o: the board of the opponent
+        :return: a score.  the larger it is, the better for the player
+        '''
+        empties = 64 - (p | o).bit_count()
+        phase = min(empties // self.EMPTIES_PER_PHASE, self.PHASES - 1)
+        return sum(map(operator.getitem, self.tables[self.side][phase], self.codes))
+    
+    @classmethod
+    def _get_swap(cls, size: int) -> list:
+        ''' This method makes a list of codes whose digits 1 and 2 are swapped.
+        
+        :param size: the number of codes, a power of 3
+        :return: a list of swapped codes of each code
+        '''
+        swap = [0]
+        power = 1
+        while power < size:
+            swap = [swap[code % power] + (0, 2, 1)[code // power] * power
+                    for code in range(power * 3)]
+            power *= 3
+        return swap
+    
+    def _get_default_weights(self) -> list:
+        ''' This method makes weights from the weights of squares.  A weight
+        of a square is divided by the number of patterns covering it.
+        
+        :return: a list of weights of each phase
+        '''
+        covers = [0] * 64
+        for image in self.instances:
+            for k in image:
+                covers[k] += 1
+        
+        phase = []
+        for name, squares in PATTERNS:
+            values = [self.WEIGHTS[y][x] / covers[y * 8 + x] for x, y in squares]
+            w = [0.0]
+            power = 1
+            for v in values:
+                w = [w[code % power] + (0, v, -v)[code // power] for code in range(power * 3)]
+                power *= 3
+            phase.append(array('i', (round(v) for v in w)))
+        return [phase] * self.PHASES
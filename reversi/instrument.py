@@ -0,0 +1,92 @@
+# ==========================================================
+# instrument.py
+# Copyright (C) 2023 Kei Shioda.  All rights reserved.
+# ==========================================================
+''' This module defines opt-in instrumentation of this application.
+
+Events are written to a metrics file as lines of JSON.  Counters of
+move generation wrap the counted functions only while they are enabled,
+so the functions cost nothing extra when instrumentation is disabled.
+'''
+from __future__ import annotations
+from reversi import bitboard
+from reversi.model import Board, Game
+import functools
+import json
+import time
+
+# (owner, name) of functions whose calls are counted
+COUNTED = [(bitboard, "get_moves"),
+           (bitboard, "get_flips"),
+           (Board, "get_changeable"),
+           (Game, "get_valid"),
+           (Game, "take_pass")]
+
+_originals = {}
+counters = {}
+
+class Recorder:
+    ''' This class writes events to a metrics file.
+    '''
+    def __init__(self, path: str) -> Recorder:
+        ''' This method opens a metrics file to append events.
+        
+        :param path: a path of the metrics file
+        :return: a created instance
+        '''
+        self.file = open(path, "a")
+    
+    def record(self, event: str, **fields) -> None:
+        ''' This method writes an event.
+        
+        :param event: a name of the event
+        :param fields: values of the event
+        '''
+        fields["event"] = event
+        fields["time"] = time.time()
+        self.file.write(json.dumps(fields) + "\n")
+        self.file.flush()
+    
+    def close(self) -> None:
+        ''' This method closes the metrics file.
+        '''
+        self.file.close()
+
+def _counted(name: str, func):
+    ''' This method wraps a function to count its calls.
+    
+    :param name: a name of the counter
+    :param func: a function to be wrapped
+    :return: a wrapped function
+    '''
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        counters[name] += 1
+        return func(*args, **kwargs)
+    return wrapper
+
+def enable_counters() -> None:
+    ''' This method starts counting calls of move generation.
+    '''
+    for owner, name in COUNTED:
+        key = owner.__name__.rsplit(".", 1)[-1] + "." + name
+        if key in _originals:
+            continue
+        func = getattr(owner, name)
+        _originals[key] = (owner, name, func)
+        counters[key] = 0
+        setattr(owner, name, _counted(key, func))
+
+def disable_counters() -> None:
+    ''' This method stops counting and restores the original functions.
+    '''
+    for owner, name, func in _originals.values():
+        setattr(owner, name, func)
+    _originals.clear()
+
+def get_counters() -> dict:
+    ''' This method returns the numbers of calls counted so far.
+    
+    :return: a dictionary of names of functions and the numbers of calls
+    '''
+    return dict(counters)
@@ -0,0 +1,276 @@
+# ==========================================================
+# mcts.py
+# Copyright (C) 2023 Kei Shioda.  All rights reserved.
+# ==========================================================
+''' This module defines a Monte Carlo tree search for the opponent player.
+
+Nodes of the tree are held in arrays indexed by node numbers instead of
+objects.  The children of a node are consecutive.  Boards of nodes are
+not stored but computed on the way from the root.
+'''
+from __future__ import annotations
+from reversi import bitboard
+from reversi.model import Board, Color
+from reversi.search import CORNERS
+from array import array
+import math
+import random
+import time
+
+class MonteCarloSearcher:
+    ''' This class searches the best move by UCT with random playouts.
+    
+    A playout plays a corner if possible, otherwise a random move.
+    After a search, the subtree under the situation of the next search,
+    if found within two plies, is kept and the rest is discarded.
+    '''
+    PASS = 64
+    EXPLORATION = 1.4
+    
+    def __init__(self, time_limit: float = None, playout_limit: int = None,
+                 max_nodes: int = 1 << 18, seed: int = None) -> MonteCarloSearcher:
+        ''' This method creates an instance.
+        
+        :param time_limit: seconds spent on a search, or None for no limit
+        :param playout_limit: playouts in a search, or None for no limit.
+                              either limit must be given.
+        :param max_nodes: the number of nodes of the pool
+        :param seed: a random seed
+        :return: a created instance
+        '''
+        assert time_limit is not None or playout_limit is not None
+        self.time_limit = time_limit
+        self.playout_limit = playout_limit
+        self.max_nodes = max_nodes
+        self.random = random.Random(seed)
+        self.table = None
+        self.parents = array('i', bytes(4 * max_nodes))
+        self.firsts = array('i', bytes(4 * max_nodes))
+        self.counts = array('b', bytes(max_nodes))
+        self.moves = array('b', bytes(max_nodes))
+        self.visits = array('i', bytes(4 * max_nodes))
+        self.wins = array('d', bytes(8 * max_nodes))
+        self.size = 0
+        self.root = None
+        self.nodes = 0
+        self.depth = 0
+        self.reused = 0
+        self.elapsed = 0.0
+    
+    def get_playouts_per_sec(self) -> float:
+        ''' This method computes playouts per second of the last search.
+        
+        :return: the number of playouts per second
+        '''
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+    
+    def search(self, board: Board, c: Color) -> int:
+        ''' This method searches the best move of the given player.
+        
+        :param board: a board to search.  it is not changed.
+        :param c: the color of this turn's player
+        :return: a bit of the best square, or 0 if there is no valid square
+        '''
+        p, o = board.get_discs(c)
+        if bitboard.get_moves(p, o) == 0:
+            return 0
+        start = time.perf_counter()
+        deadline = None if self.time_limit is None else start + self.time_limit
+        self._reuse(p, o)
+        self.nodes = 0
+        self.depth = 0
+        
+        while True:
+            node, np_, no, depth = self._select()
+            node, np_, no = self._expand(node, np_, no)
+            result = self._playout(np_, no)
+            self._backpropagate(node, result)
+            self.nodes += 1
+            self.depth = max(self.depth, depth)
+            if self.playout_limit is not None and self.nodes >= self.playout_limit:
+                break
+            if deadline is not None and self.nodes % 16 == 0 and time.perf_counter() >= deadline:
+                break
+        
+        first = self.firsts[0]
+        best = max(range(first, first + self.counts[0]), key=lambda n: self.visits[n])
+        self.elapsed = time.perf_counter() - start
+        return 1 << self.moves[best]
+    
+    def _play(self, p: int, o: int, move: int) -> tuple:
+        ''' This method plays a move of a node.
+        
+        :param p: the board of the player to move
+        :param o: the board of the opponent
+        :param move: the index of the square or PASS
+        :return: a tuple of the boards of the next player and the opponent
+        '''
+        if move == self.PASS:
+            return (o, p)
+        m = 1 << move
+        f = bitboard.get_flips(p, o, m)
+        return (o & ~f, p | m | f)
+    
+    def _select(self) -> tuple:
+        ''' This method descends the tree from the root by UCT.
+        
+        :return: a tuple of a leaf node, its boards and its depth
+        '''
+        p, o = self.root
+        node = 0
+        depth = 0
+        counts, firsts, visits, wins = self.counts, self.firsts, self.visits, self.wins
+        while counts[node] > 0:
+            first = firsts[node]
+            log = math.log(visits[node])
+            best = -1.0
+            for child in range(first, first + counts[node]):
+                n = visits[child]
+                if n == 0:
+                    node = child
+                    break
+                score = wins[child] / n + self.EXPLORATION * math.sqrt(log / n)
+                if score > best:
+                    best = score
+                    node = child
+            p, o = self._play(p, o, self.moves[node])
+            depth += 1
+        return (node, p, o, depth)
+    
+    def _expand(self, node: int, p: int, o: int) -> tuple:
+        ''' This method creates children of a visited leaf node and chooses
+        the first one.
+        
+        :param node: a leaf node
+        :param p: the board of the player to move
+        :param o: the board of the opponent
+        :return: a tuple of the chosen node and its boards
+        '''
+        if self.visits[node] == 0 and node != 0:
+            return (node, p, o)
+        moves = bitboard.get_moves(p, o)
+        if moves:
+            indices = list(bitboard.iter_bits(moves))
+        elif bitboard.get_moves(o, p):
+            indices = [self.PASS]
+        else:
+            return (node, p, o)
+        if self.size + len(indices) > self.max_nodes:
+            return (node, p, o)
+        
+        first = self.size
+        for i, k in enumerate(indices):
+            child = first + i
+            self.parents[child] = node
+            self.counts[child] = 0
+            self.moves[child] = k
+            self.visits[child] = 0
+            self.wins[child] = 0.0
+        self.firsts[node] = first
+        self.counts[node] = len(indices)
+        self.size += len(indices)
+        p, o = self._play(p, o, indices[0])
+        return (first, p, o)
+    
+    def _playout(self, p: int, o: int) -> int:
+        ''' This method plays random moves to the end of the game.
+        
+        :param p: the board of the player to move
+        :param o: the board of the opponent
+        :return: the final disc difference from the side of the player
+        '''
+        sign = 1
+        passed = False
+        rand = self.random.random
+        while True:
+            moves = bitboard.get_moves(p, o)
+            if moves == 0:
+                if passed:
+                    break
+                passed = True
+            else:
+                passed = False
+                if moves & CORNERS:
+                    moves &= CORNERS
+                k = int(rand() * moves.bit_count())
+                for i in range(k):
+                    moves &= moves - 1
+                m = moves & -moves
+                f = bitboard.get_flips(p, o, m)
+                p, o = p | m | f, o & ~f
+            p, o = o, p
+            sign = -sign
+        return sign * (p.bit_count() - o.bit_count())
+    
+    def _backpropagate(self, node: int, result: int) -> None:
+        ''' This method adds the result of a playout to the nodes on the way
+        to the root.  Wins of a node are counted for the player who played
+        the move of the node.
+        
+        :param node: the leaf node of the playout
+        :param result: the final disc difference from the side of the
+                       player to move at the leaf node
+        '''
+        value = 0.0 if result > 0 else 1.0 if result < 0 else 0.5
+        while True:
+            self.visits[node] += 1
+            self.wins[node] += value
+            if node == 0:
+                break
+            node = self.parents[node]
+            value = 1.0 - value
+    
+    def _reuse(self, p: int, o: int) -> None:
+        ''' This method makes the root of the situation keeping its subtree
+        of the last search if it is found within two plies.
+        
+        :param p: the board of the player to move
+        :param o: the board of the opponent
+        '''
+        found = None
+        if self.root is not None:
+            frontier = [(0, self.root)]
+            for ply in range(3):
+                nexts = []
+                for node, (np_, no) in frontier:
+                    if (np_, no) == (p, o):
+                        found = node
+                        break
+                    first = self.firsts[node]
+                    for child in range(first, first + self.counts[node]):
+                        nexts.append((child, self._play(np_, no, self.moves[child])))
+                if found is not None:
+                    break
+                frontier = nexts
+        
+        self.root = (p, o)
+        if found is None:
+            self.size = 1
+            self.parents[0] = 0
+            self.counts[0] = 0
+            self.visits[0] = 0
+            self.wins[0] = 0.0
+            self.reused = 0
+            return
+        
+        # copy the subtree in breadth-first order to the head of the arrays
+        order = [found]
+        i = 0
+        while i < len(order):
+            node = order[i]
+            first = self.firsts[node]
+            order.extend(range(first, first + self.counts[node]))
+            i += 1
+        number = {node: i for i, node in enumerate(order)}
+        values = [(self.counts[n], self.moves[n], self.visits[n], self.wins[n],
+                   number[self.firsts[n]] if self.counts[n] > 0 else 0,
+                   number.get(self.parents[n], 0)) for n in order]
+        for i, (count, move, visits, wins, first, parent) in enumerate(values):
+            self.counts[i] = count
+            self.moves[i] = move
+            self.visits[i] = visits
+            self.wins[i] = wins
+            self.firsts[i] = first
+            self.parents[i] = parent
+        self.size = len(order)
+        self.reused = self.size
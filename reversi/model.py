@@ -6,6 +6,13 @@
 '''
 from __future__ import annotations
 from enum import Enum
+import time
+from reversi import bitboard, zobrist
+from reversi.movecache import MoveCache
+from reversi.ttable import TranspositionTable
+from reversi.endgame import EndgameSolver
+from reversi.book import OpeningBook
+from reversi.evaluate import PatternEvaluator
 
 class State(Enum):
     ''' This class indicates a state of this application.
@@ -91,6 +98,10 @@ class GameResult(Enum):
 
 class Board:
     ''' This class defines a game board.
+    
+    Discs are held in two bitboards, one for each color.
+    Bit ((y - 1) * size + (x - 1)) indicates the square at (x, y).
+    The constants below are of the default size.
     '''
     BOARD_SIZE = 8
     WALL_SIZE = 2
@@ -102,24 +113,89 @@ class Board:
     DIRECTIONS = [(1, 0), (1, 1), (0, 1), (-1, 1), 
                   (-1, 0), (-1, -1), (0, -1), (1, -1)]
     
-    def __init__(self) -> Board:
+    # valid moves of recent situations shared by all boards
+    move_cache = MoveCache()
+    
+    def __init__(self, size: int = BOARD_SIZE) -> Board:
         ''' This method creates an instance of Board.
         
+        :param size: the number of squares of a side, an even number
+        :return: a created instance
+        '''
+        self.size = size
+        self.geometry = bitboard.get_geometry(size)
+        self.black = 0
+        self.white = 0
+        
+        lower = size // 2
+        upper = lower + 1
+        self.black |= self._to_bit(lower, lower)
+        self.white |= self._to_bit(upper, lower)
+        self.white |= self._to_bit(lower, upper)
+        self.black |= self._to_bit(upper, upper)
+        self.history = []
+        self.side = Color.BLACK
+        self.hash = zobrist.get_hash(self.black, self.white, False)
+    
+    def copy(self) -> Board:
+        ''' This method creates a copy of this board.
+        
         :return: a created instance
         '''
-        self.board = [[Square.NONE] * (self.BOARD_SIZE + self.WALL_SIZE) for i in range(self.BOARD_SIZE + self.WALL_SIZE)]
+        board = Board.__new__(Board)
+        board.size = self.size
+        board.geometry = self.geometry
+        board.black = self.black
+        board.white = self.white
+        board.history = list(self.history)
+        board.side = self.side
+        board.hash = self.hash
+        return board
+    
+    def _to_bit(self, x: int, y: int) -> int:
+        ''' This method converts coordinates of the board into a bit.
         
-        for i in range(len(self.board)):
-            self.board[self.LOWER_WALL][i] = Square.WALL
-            self.board[self.UPPER_WALL][i] = Square.WALL
-        for j in range(len(self.board)):
-            self.board[j][self.LOWER_WALL] = Square.WALL
-            self.board[j][self.UPPER_WALL] = Square.WALL
+        :param x: x coordinate of a square
+        :param y: y coordinate of a square
+        :return: an int whose only one bit indicates the square
+        '''
+        return self.geometry.to_bit(x - 1, y - 1)
+    
+    def get_discs(self, c: Color) -> tuple:
+        ''' This method returns bitboards of the given color's player.
         
-        self.board[self.LOWER_CENTER][self.LOWER_CENTER] = Square.BLACK
-        self.board[self.LOWER_CENTER][self.UPPER_CENTER] = Square.WHITE
-        self.board[self.UPPER_CENTER][self.LOWER_CENTER] = Square.WHITE
-        self.board[self.UPPER_CENTER][self.UPPER_CENTER] = Square.BLACK
+        :param c: the color of the player
+        :return: a tuple of the player's board and the opponent's board
+        '''
+        assert c is Color.BLACK or c is Color.WHITE
+        if c is Color.BLACK:
+            return (self.black, self.white)
+        else:
+            return (self.white, self.black)
+    
+    def set_discs(self, c: Color, p: int, o: int) -> None:
+        ''' This method sets bitboards of the given color's player.
+        
+        :param c: the color of the player
+        :param p: the board of the player
+        :param o: the board of the opponent
+        '''
+        assert c is Color.BLACK or c is Color.WHITE
+        if c is Color.BLACK:
+            self.black, self.white = p, o
+        else:
+            self.white, self.black = p, o
+    
+    def _get_hash_change(self, m: int, f: int, c: Color) -> int:
+        ''' This method computes the change of the hash by a move.
+        
+        :param m: an int whose only one bit indicates the putting square,
+                  or 0 for a pass
+        :param f: a board of flipped discs
+        :param c: the color of the moving player
+        :return: an int to be xored with the hash
+        '''
+        return zobrist.get_change(m, f, c is Color.WHITE)
     
     def update(self, x: int, y: int, c: Color) -> bool:
         ''' This method updates the board situation.
@@ -129,51 +205,150 @@ class Board:
         :param c: indicates the disc's color
         :return: if update is done, return true, otherwise return false
         '''
-        changeable = self.get_changeable(x, y, c)
-        
-        if len(changeable) <= 1:
+        m = self._to_bit(x, y)
+        f = self.get_valid_flips(c).get(m)
+        if f is None:
             return False
-        
-        for i in changeable:
-            x, y = i
-            self.board[y][x] = Square.to_square(c)
+        self._play(m, f, c)
         return True
     
+    def make_move(self, x: int, y: int, c: Color) -> tuple:
+        ''' This method puts a disc and pushes an undo record.
+        
+        :param x: x coordinate of a square where a disc is put
+        :param y: y coordinate of a square where a disc is put
+        :param c: the disc's color
+        :return: if the putting is valid, return an undo record,
+                 otherwise, return None
+        '''
+        return self.put(self._to_bit(x, y), c)
+    
+    def put(self, m: int, c: Color) -> tuple:
+        ''' This method is the same as make_move but takes a bit.
+        
+        :param m: an int whose only one bit indicates the putting square
+        :param c: the disc's color
+        :return: if the putting is valid, return an undo record,
+                 otherwise, return None
+        '''
+        p, o = self.get_discs(c)
+        f = self.geometry.get_flips(p, o, m)
+        
+        if f == 0 or m & (p | o):
+            return None
+        return self._play(m, f, c)
+    
+    def _play(self, m: int, f: int, c: Color) -> tuple:
+        ''' This method puts a disc on a valid square.
+        
+        :param m: an int whose only one bit indicates the putting square
+        :param f: a board of discs flipped by the putting
+        :param c: the disc's color
+        :return: an undo record
+        '''
+        p, o = self.get_discs(c)
+        self.set_discs(c, p | m | f, o & ~f)
+        self.hash ^= self._get_hash_change(m, f, c)
+        self.side = Color.get_opponent(c)
+        record = (m, f, c)
+        self.history.append(record)
+        return record
+    
+    def pass_move(self, c: Color) -> tuple:
+        ''' This method passes a turn and pushes an undo record.
+        
+        :param c: the color of the passing player
+        :return: an undo record
+        '''
+        self.hash ^= zobrist.SIDE
+        self.side = Color.get_opponent(c)
+        record = (0, 0, c)
+        self.history.append(record)
+        return record
+    
+    def unmake_move(self, record: tuple = None) -> tuple:
+        ''' This method takes back the last move or pass.
+        
+        :param record: an undo record returned by make_move, put or
+                       pass_move.  it must be the last one if given.
+        :return: the taken back record
+        '''
+        last = self.history.pop()
+        assert record is None or record is last
+        m, f, c = last
+        if m:
+            p, o = self.get_discs(c)
+            self.set_discs(c, p & ~(m | f), o | f)
+        self.hash ^= self._get_hash_change(m, f, c)
+        self.side = c
+        return last
+    
     def get_changeable(self, x: int, y: int, c: Color) -> List:
-        player = Square.to_square(c)
-        opponent = Square.to_square(Color.get_opponent(c))
+        ''' This method finds squares changed by putting a disc.
+        
+        :param x: x coordinate of a square where a disc is put
+        :param y: y coordinate of a square where a disc is put
+        :param c: the disc's color
+        :return: a list of coordinates of the putting square
+                 and squares of flipped over discs
+        '''
+        m = self._to_bit(x, y)
+        f = self.get_valid_flips(c).get(m)
+        if f is not None:
+            return [(x, y)] + [(k % self.size + 1, k // self.size + 1) for k in bitboard.iter_bits(f)]
+        p, o = self.get_discs(c)
+        if not (p | o) & m:
+            # an empty square which is not valid flips nothing
+            return [(x, y)]
+        
         change = [(x, y)]
-        for d in self.DIRECTIONS:
-            dx, dy = d
+        geometry = self.geometry
+        for dx, dy, n, mask in geometry.directions:
+            f = geometry.get_flips_in(p, o, m, n, mask)
             i = 1
-            j = 1
-            candidate = []
-            while self.board[y + dy * j][x + dx * i] == opponent:
-                candidate.append((x + dx * i, y + dy * j))
+            while f:
+                change.append((x + dx * i, y + dy * i))
+                f &= ~geometry.shift(m, n * i)
                 i += 1
-                j += 1
-            if len(candidate) > 0 and self.board[y + dy * j][x + dx * i] == player:
-                for p in candidate:
-                    change.append(p)
         return change
     
+    def get_valid_flips(self, c: Color) -> dict:
+        ''' This method finds valid squares and discs flipped by them
+        through the move cache.
+        
+        :param c: the color of this turn's player
+        :return: a dictionary of bits of valid squares in ascending order
+                 and boards of flipped discs.  it must not be changed.
+        '''
+        p, o = self.get_discs(c)
+        return self.move_cache.get(self.hash, c, p, o, self.geometry)
+    
+    def get_moves(self, c: Color) -> int:
+        ''' This method finds all valid squares for the given color.
+        
+        :param c: the color of this turn's player
+        :return: a bitboard of valid squares
+        '''
+        p, o = self.get_discs(c)
+        return self.geometry.get_moves(p, o)
+    
     def to_color(self) -> List:
         ''' This method converts Square to Color for the board except WALL zone
         
-        :return: 8x8 List of Color
+        :return: size x size List of Color
         '''
         col = []
-        for j in range(self.LOWER_WALL+1, self.UPPER_WALL):
-            row = []
-            for i in range(self.LOWER_WALL+1, self.UPPER_WALL):
-                match self.board[j][i]:
-                    case Square.BLACK:
-                       row.append(Color.BLACK)
-                    case Square.WHITE:
-                       row.append(Color.WHITE)
-                    case _:
-                       row.append(Color.NONE)
-            col.append(row)
+        row = []
+        for k in range(self.size * self.size):
+            if self.black >> k & 1:
+                row.append(Color.BLACK)
+            elif self.white >> k & 1:
+                row.append(Color.WHITE)
+            else:
+                row.append(Color.NONE)
+            if len(row) == self.size:
+                col.append(row)
+                row = []
         return col
     
     def count(self) -> tuple:
@@ -181,38 +356,186 @@ class Board:
         
         :return: a tuple that contains the number of black and that of white
         '''
-        black = 0
-        white = 0
-        for j in self.board:
-            for i in j:
-                if i == Square.BLACK:
-                    black += 1
-                elif i == Square.WHITE:
-                    white += 1
-                else:
-                    pass
-        return (black, white)
+        return (bitboard.count(self.black), bitboard.count(self.white))
+
+class Position:
+    ''' This class defines an immutable board situation.
+    
+    A position has the boards of both colors, the color to move, the
+    number of consecutive passes before it and the size of the board.
+    Its hash is the same as
+    the hash of Board, so hashing and comparing positions costs O(1).
+    Positions can be shared by threads and are cheap to pickle.
+    '''
+    __slots__ = ("black", "white", "side", "passes", "hash", "size")
+    
+    def __init__(self, black: int = None, white: int = None, side: Color = Color.BLACK,
+                 passes: int = 0, h: int = None, size: int = Board.BOARD_SIZE) -> Position:
+        ''' This method creates an instance.  The default is the initial
+        situation.
+        
+        :param black: a bitboard of black discs, or None for the initial one
+        :param white: a bitboard of white discs, or None for the initial one
+        :param side: the color to move
+        :param passes: the number of consecutive passes before this position
+        :param h: the hash if it is known
+        :param size: the number of squares of a side of the board
+        :return: a created instance
+        '''
+        if black is None or white is None:
+            black, white = bitboard.get_geometry(size).get_initial()
+        if h is None:
+            h = zobrist.get_hash(black, white, side is Color.WHITE)
+        setter = object.__setattr__
+        setter(self, "black", black)
+        setter(self, "white", white)
+        setter(self, "side", side)
+        setter(self, "passes", passes)
+        setter(self, "hash", h)
+        setter(self, "size", size)
+    
+    @classmethod
+    def from_board(cls, board: Board, passes: int = 0) -> Position:
+        ''' This method creates a position of a board.
+        
+        :param board: a board
+        :param passes: the number of consecutive passes
+        :return: a created instance
+        '''
+        return cls(board.black, board.white, board.side, passes, board.hash, board.size)
+    
+    def to_board(self) -> Board:
+        ''' This method creates a board of this position without history.
+        
+        :return: a created board
+        '''
+        board = Board(self.size)
+        board.black = self.black
+        board.white = self.white
+        board.side = self.side
+        board.hash = self.hash
+        return board
+    
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError("Position is immutable")
+    
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("Position is immutable")
+    
+    def __hash__(self) -> int:
+        return self.hash
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Position):
+            return NotImplemented
+        return (self.hash == other.hash and self.black == other.black and self.white == other.white
+                and self.side is other.side and self.passes == other.passes and self.size == other.size)
+    
+    def __reduce__(self) -> tuple:
+        return (Position, (self.black, self.white, self.side, self.passes, self.hash, self.size))
+    
+    def __repr__(self) -> str:
+        return "Position(0x%016x, 0x%016x, %s, %d, size=%d)" % (self.black, self.white, self.side,
+                                                                self.passes, self.size)
+    
+    def get_discs(self) -> tuple:
+        ''' This method returns bitboards of the player to move.
+        
+        :return: a tuple of the player's board and the opponent's board
+        '''
+        if self.side is Color.BLACK:
+            return (self.black, self.white)
+        return (self.white, self.black)
+    
+    def get_moves(self) -> int:
+        ''' This method finds valid squares of the player to move.
+        
+        :return: a bitboard of valid squares
+        '''
+        p, o = self.get_discs()
+        return bitboard.get_geometry(self.size).get_moves(p, o)
+    
+    def is_finished(self) -> bool:
+        ''' This method indicates whether both players have passed.
+        
+        :return: if the game is over, return true, otherwise, return false
+        '''
+        return self.passes >= 2
+    
+    def play(self, m: int) -> Position:
+        ''' This method creates the position after a move or a pass.
+        
+        :param m: an int whose only one bit indicates the putting square,
+                  or 0 for a pass
+        :return: a created instance
+        '''
+        p, o = self.get_discs()
+        c = self.side
+        geometry = bitboard.get_geometry(self.size)
+        if m == 0:
+            if geometry.get_moves(p, o):
+                raise ValueError("a pass is invalid when there are valid squares")
+            h = self.hash ^ zobrist.SIDE
+            return Position(self.black, self.white, Color.get_opponent(c), self.passes + 1, h, self.size)
+        
+        f = geometry.get_flips(p, o, m)
+        if f == 0 or m & (p | o):
+            raise ValueError("the move is invalid")
+        h = self.hash ^ zobrist.get_change(m, f, c is Color.WHITE)
+        p, o = p | m | f, o & ~f
+        if c is Color.BLACK:
+            return Position(p, o, Color.WHITE, 0, h, self.size)
+        return Position(o, p, Color.BLACK, 0, h, self.size)
 
 class Game:
     ''' This class defines a game of reversi.
     '''
-    def __init__(self) -> Game:
+    def __init__(self, size: int = Board.BOARD_SIZE) -> Game:
         ''' This method creates a instance
         
+        :param size: the number of squares of a side of the board
         :return: a created instance
         '''
-        self.board = Board()
+        self.board = Board(size)
         self.passflag = False
         self.finishflag = False
         self.gameresult = None
+        self.empty = self.board.geometry.full & ~(self.board.black | self.board.white)
     
     def get_board_situation(self) -> List:
         ''' This method returns the current situation on the board
         
-        :return: a 8x8 List of Color
+        :return: a size x size List of Color
         '''
         return self.board.to_color()
     
+    def set_board_situation(self, black: int, white: int, c: Color) -> None:
+        ''' This method sets up a situation on the board without its history.
+        
+        :param black: a bitboard of black discs
+        :param white: a bitboard of white discs
+        :param c: the color of this turn's player
+        '''
+        self.set_position(Position(black, white, c, size=self.board.size))
+    
+    def get_position(self) -> Position:
+        ''' This method returns the current situation as a position.
+        
+        :return: a position of the board and the color to move
+        '''
+        return Position.from_board(self.board, 1 if self.passflag else 0)
+    
+    def set_position(self, position: Position) -> None:
+        ''' This method sets up a position on the board without its history.
+        
+        :param position: a position
+        '''
+        self.board = position.to_board()
+        self.passflag = position.passes > 0
+        self.finishflag = False
+        self.gameresult = None
+        self.empty = self.board.geometry.full & ~(position.black | position.white)
+    
     def put_disc(self, x: int, y: int, c: Color) -> bool:
         ''' This method puts a disc on the board.
         
@@ -225,6 +548,8 @@ class Game:
         if not self.board.update(x, y, c):
             return False
         
+        m = self.board._to_bit(x, y)
+        self.empty &= ~m
         self.passflag = False
         return True
     
@@ -235,29 +560,37 @@ class Game:
         :return: if there is no valid putting position, return true,
                  otherwise, return false
         '''
-        b = self.board.to_color()
-        indices = []
-        for j in range(0,len(b)):
-            for i in range(0,len(b)):
-                if b[j][i] == Color.NONE:
-                    indices.append((i, j))
-        
-        is_valid = False
-        for i in indices:
-            x, y = i
-            if len(self.board.get_changeable(x + 1, y + 1, c)) > 1:
-                is_valid = True
-                break
-        
-        if is_valid:
+        if self.board.get_valid_flips(c):
             return False
         
         if self.passflag:
             self.finishflag = True
         
+        self.board.pass_move(c)
         self.passflag = True
         return True
     
+    def undo(self, c: Color) -> bool:
+        ''' This method takes back moves up to the last action of a player.
+        
+        :param c: the color of the player whose last action is taken back
+        :return: if there is an action to take back, return true,
+                 otherwise, return false
+        '''
+        history = self.board.history
+        if not any(r[2] is c for r in history):
+            return False
+        
+        while history[-1][2] is not c:
+            self.board.unmake_move()
+        self.board.unmake_move()
+        
+        self.empty = self.board.geometry.full & ~(self.board.black | self.board.white)
+        self.passflag = len(history) > 0 and history[-1][0] == 0
+        self.finishflag = False
+        self.gameresult = None
+        return True
+    
     def surrender(self, is_user: bool) -> bool:
         ''' This method is for surrender.
         
@@ -318,20 +651,9 @@ class Game:
         :return: a list of tuples that contains coordinates of a valid square
                  and the number of discs flipped over
         '''
-        b = self.board.to_color()
-        indices = []
-        for j in range(0,len(b)):
-            for i in range(0,len(b)):
-                if b[j][i] == Color.NONE:
-                    indices.append((i, j))
-        
-        valid = []
-        for i in indices:
-            x, y = i
-            n = len(self.board.get_changeable(x + 1, y + 1, c))
-            if n > 1:
-                valid.append((i, n))
-        return valid
+        flips = self.board.get_valid_flips(c)
+        to_coordinate = self.board.geometry.to_coordinate
+        return [(to_coordinate(m.bit_length() - 1), bitboard.count(f) + 1) for m, f in flips.items()]
 
 class Player:
     ''' This class defines a player.
@@ -364,6 +686,14 @@ class Player:
         '''
         return self.game.take_pass(self.color)
     
+    def undo(self) -> bool:
+        ''' This method takes back this player's last action.
+        
+        :return: if there is an action to take back, return true,
+                 otherwise, return false.
+        '''
+        return self.game.undo(self.color)
+    
     def surrender(self, is_user: bool) -> bool:
         ''' This method is for surrender.
         
@@ -376,20 +706,70 @@ class Player:
 class Opponent:
     ''' This class defines an opponent player.
     '''
-    def __init__(self, g: Game, c: Color) -> Opponent:
+    def __init__(self, g: Game, c: Color, time_limit: float = 1.0,
+                 node_limit: int = None, max_depth: int = 60,
+                 table_size: float = 16, endgame_empties: int = 10,
+                 book: OpeningBook = None, workers: int = 1,
+                 weights: str = None, engine: str = "search") -> Opponent:
         ''' This method creates an instance.
         
         :param g: a given game
         :param c: this player's playing color
+        :param time_limit: seconds he thinks for a move
+        :param node_limit: nodes he searches for a move, or None for no limit
+        :param max_depth: the maximum depth he searches
+        :param table_size: megabytes of his transposition table
+        :param endgame_empties: he reads the game to the end perfectly
+                                when empty squares are this number or less
+        :param book: an opening book he follows, or None
+        :param workers: the number of processes he searches with.
+                        if more than 1, call close() after the game.
+        :param weights: a path of a weight file of PatternEvaluator, or None
+                        to evaluate by weights of squares
+        :param engine: "search" for the alpha-beta search or "mcts" for
+                       the Monte Carlo tree search, whose playouts are
+                       limited by node_limit
         :return: a created instance
+        
+        On boards of other sizes than 8, the opening book and the endgame
+        solver are not used, and only the alpha-beta search with weights
+        of squares is available.
         '''
+        # reversi.search, reversi.parallel and reversi.mcts depend on this module
+        from reversi.search import Searcher
+        from reversi.parallel import ParallelSearcher
+        from reversi.mcts import MonteCarloSearcher
+        
+        if g.board.size != Board.BOARD_SIZE:
+            if engine != "search" or weights is not None:
+                raise ValueError("only the search by weights of squares plays on %dx%d boards"
+                                 % (g.board.size, g.board.size))
+            book = None
+            endgame_empties = 0
+        
         self.game = g
         self.color = c
         self.player = Player(g, c)
+        self.engine = engine
+        if engine == "mcts":
+            self.searcher = MonteCarloSearcher(time_limit, node_limit)
+        elif workers > 1:
+            self.searcher = ParallelSearcher(workers, time_limit, node_limit, max_depth, table_size,
+                                             weights)
+        else:
+            evaluator = PatternEvaluator.load(weights) if weights is not None else None
+            self.searcher = Searcher(evaluator, time_limit=time_limit, node_limit=node_limit,
+                                     max_depth=max_depth, table=TranspositionTable(table_size))
+        self.solver = EndgameSolver()
+        self.endgame_empties = endgame_empties
+        self.book = book
+        self.recorder = None
     
-    def move(self) -> bool:
+    def move(self, pondered: int = 0) -> bool:
         ''' This method lets the opponent player take an action at his turn.
         
+        :param pondered: a bit of a move found by pondering for this
+                         situation, or 0
         :return: if he puts a disc, return true,
                  if he passes, return false
         '''
@@ -398,11 +778,64 @@ class Opponent:
             self.player.take_pass()
             return False
         
-        max = -1
-        x = y = 0
-        for i in valid:
-            if i[1] > max:
-                max = i[1]
-                x, y = i[0]
+        if self.recorder is not None:
+            start = time.perf_counter()
+            hits, misses = self._get_table_counts()
+        
+        p, o = self.game.board.get_discs(self.color)
+        entry = self.book.lookup(p, o) if self.book is not None else None
+        if entry is not None:
+            m, score = entry
+            engine = "book"
+        elif bitboard.count(self.game.empty) <= self.endgame_empties:
+            m, score = self.solver.solve_move(p, o)
+            engine = "endgame"
+        elif pondered & self.game.board.get_moves(self.color):
+            m = pondered
+            engine = "ponder"
+        else:
+            m = self.searcher.search(self.game.board, self.color)
+            engine = self.engine
+        
+        if self.recorder is not None:
+            self._record(engine, time.perf_counter() - start, hits, misses)
+        x, y = self.game.board.geometry.to_coordinate(m.bit_length() - 1)
         assert self.player.put_disc(x + 1, y + 1) == True
         return True
+    
+    def close(self) -> None:
+        ''' This method stops the processes of the parallel search, if any.
+        '''
+        if hasattr(self.searcher, "close"):
+            self.searcher.close()
+    
+    def _get_table_counts(self) -> tuple:
+        ''' This method returns the counters of the transposition table.
+        
+        :return: a tuple of hits and misses, or zeros if there is no table
+        '''
+        table = self.searcher.table
+        if table is None:
+            return (0, 0)
+        return (table.hits, table.misses)
+    
+    def _record(self, engine: str, elapsed: float, hits: int, misses: int) -> None:
+        ''' This method records statistics of the engine used for a move.
+        
+        :param engine: a name of the engine, book, endgame, ponder, search
+                       or mcts
+        :param elapsed: seconds spent on the move
+        :param hits: hits of the transposition table before the move
+        :param misses: misses of the transposition table before the move
+        '''
+        nodes = depth = 0
+        if engine == "search" or engine == "mcts":
+            nodes, depth = self.searcher.nodes, self.searcher.depth
+        elif engine == "endgame":
+            nodes, depth = self.solver.nodes, bitboard.count(self.game.empty)
+        table_hits, table_misses = self._get_table_counts()
+        hits = table_hits - hits
+        misses = table_misses - misses
+        self.recorder.record("move", engine=engine, color=Color.to_str(self.color),
+                             nodes=nodes, depth=depth, seconds=elapsed,
+                             cache_hit_rate=hits / (hits + misses) if hits + misses > 0 else 0.0)
@@ -0,0 +1,86 @@
+# ==========================================================
+# movecache.py
+# Copyright (C) 2023 Kei Shioda.  All rights reserved.
+# ==========================================================
+''' This module defines a cache of valid moves of situations.
+'''
+from __future__ import annotations
+from reversi import bitboard
+from collections import OrderedDict
+import threading
+
+class MoveCache:
+    ''' This class keeps valid moves and their flipped discs of recently
+    seen situations.
+    
+    An entry is keyed by the hash of a situation, the color to move and
+    the size of the board.  It also has the boards of the situation, so
+    that a different situation with the same hash is not mistaken for
+    it.  When the cache is full, the least recently used entry is
+    removed.
+    '''
+    def __init__(self, capacity: int = 4096) -> MoveCache:
+        ''' This method creates an instance.
+        
+        :param capacity: the maximum number of entries
+        :return: a created instance
+        '''
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self) -> int:
+        ''' This method returns the number of entries.
+        
+        :return: the number of entries
+        '''
+        return len(self.entries)
+    
+    def clear(self) -> None:
+        ''' This method removes all entries and resets the counters.
+        '''
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def get(self, h: int, c, p: int, o: int, geometry: bitboard.Geometry = None) -> dict:
+        ''' This method finds valid moves of a situation.
+        
+        :param h: the hash of the situation
+        :param c: the color of the player to move
+        :param p: the board of the player to move
+        :param o: the board of the opponent
+        :param geometry: the geometry of the board, or None for 8x8
+        :return: a dictionary of bits of valid squares in ascending order
+                 and boards of discs flipped by them.  it must not be
+                 changed.
+        '''
+        if geometry is None:
+            geometry = bitboard.get_geometry()
+        key = (h, c, geometry.size)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == p and entry[1] == o:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+        
+        flips = {m: geometry.get_flips(p, o, m) for m in bitboard.iter_masks(geometry.get_moves(p, o))}
+        with self.lock:
+            self.entries[key] = (p, o, flips)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        return flips
+    
+    def get_hit_rate(self) -> float:
+        ''' This method computes the ratio of hits to all lookups.
+        
+        :return: the hit rate, or 0 if there is no lookup
+        '''
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
@@ -0,0 +1,191 @@
+# ==========================================================
+# parallel.py
+# Copyright (C) 2023 Kei Shioda.  All rights reserved.
+# ==========================================================
+''' This module defines a parallel search on worker processes.
+
+All workers search the same situation in the manner of Lazy SMP and
+share a transposition table in shared memory, so results found by one
+worker cut the trees of the others.  Half of the helpers search one ply
+deeper than the main worker to spread the work over different depths.
+'''
+from __future__ import annotations
+from reversi.model import Board, Color, Game, Position
+from reversi.evaluate import Evaluator, PatternEvaluator
+from reversi.search import Searcher
+from reversi.ttable import TranspositionTable
+from multiprocessing import shared_memory
+import multiprocessing
+import time
+
+class SharedTranspositionTable(TranspositionTable):
+    ''' This class stores search results in shared memory.
+    
+    Entries are not locked.  A torn entry is ignored by the check of
+    TranspositionTable.  The counters are of this process only.
+    '''
+    def __init__(self, megabytes: float = 16, name: str = None) -> SharedTranspositionTable:
+        ''' This method creates a table or attaches to an existing one.
+        
+        :param megabytes: the maximum memory size of the table
+        :param name: a name of the shared memory of an existing table
+                     of the same size, or None to create a new one
+        :return: a created instance
+        '''
+        self.memory = None
+        self.name = name
+        super().__init__(megabytes)
+        self.name = self.memory.name
+    
+    def _allocate(self, words: int):
+        ''' This method allocates words in shared memory or fills them with
+        zero if they are already allocated.
+        
+        :param words: the number of 64-bit words
+        :return: a sequence of 64-bit words
+        '''
+        if self.memory is None:
+            if self.name is None:
+                self.memory = shared_memory.SharedMemory(create=True, size=words * 8)
+            else:
+                self.memory = shared_memory.SharedMemory(self.name)
+            return self.memory.buf[:words * 8].cast('Q')
+        self.memory.buf[:words * 8] = bytes(words * 8)
+        return self.table
+    
+    def close(self, unlink: bool = False) -> None:
+        ''' This method detaches the shared memory.
+        
+        :param unlink: if this process created the table and it is no
+                       longer used, set true to free the shared memory
+        '''
+        self.table.release()
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
+
+class _Helper(Searcher):
+    ''' This class searches deeper than the given depth by an offset.
+    '''
+    def __init__(self, offset: int, **kwargs) -> _Helper:
+        ''' This method creates an instance.
+        
+        :param offset: plies added to each depth
+        :param kwargs: arguments of Searcher
+        :return: a created instance
+        '''
+        super().__init__(**kwargs)
+        self.offset = offset
+    
+    def _search_root(self, board: Board, c: Color, moves: list, depth: int) -> dict:
+        return super()._search_root(board, c, moves, depth + self.offset)
+
+def _work(conn, name: str, options: dict, offset: int, stop) -> None:
+    ''' This method searches situations received from the parent process.
+    
+    :param conn: a connection to the parent process
+    :param name: a name of the shared memory of the table
+    :param options: time_limit, node_limit, max_depth, table_size and weights
+    :param offset: plies added to each depth
+    :param stop: an event to stop the search, or None for the main worker
+    '''
+    table = SharedTranspositionTable(options["table_size"], name)
+    weights = options["weights"]
+    evaluator = PatternEvaluator.load(weights) if weights is not None else None
+    searcher = _Helper(offset, evaluator=evaluator,
+                       time_limit=options["time_limit"], node_limit=options["node_limit"],
+                       max_depth=options["max_depth"], table=table)
+    searcher.interrupt = stop
+    game = Game()
+    while (position := conn.recv()) is not None:
+        game.set_position(position)
+        hits, misses = table.hits, table.misses
+        m = searcher.search(game.board, position.side)
+        depth = searcher.depth + offset if searcher.depth > 0 else 0
+        conn.send((m, depth, searcher.score, searcher.nodes,
+                   table.hits - hits, table.misses - misses))
+    table.close()
+
+class ParallelSearcher:
+    ''' This class searches the best move on worker processes.
+    
+    It has the same attributes as Searcher.  When the main
+    worker finishes, the helpers are stopped and the result of the
+    deepest completed depth is used.
+    '''
+    def __init__(self, workers: int = None, time_limit: float = None,
+                 node_limit: int = None, max_depth: int = 60,
+                 table_size: float = 16, weights: str = None) -> ParallelSearcher:
+        ''' This method starts worker processes.
+        
+        :param workers: the number of processes, or None for the number of CPUs
+        :param time_limit: seconds spent on a search, or None for no limit
+        :param node_limit: nodes visited in a search by each worker,
+                           or None for no limit
+        :param max_depth: the maximum depth of iterative deepening
+        :param table_size: megabytes of the shared transposition table
+        :param weights: a path of a weight file of PatternEvaluator, or None
+        :return: a created instance
+        '''
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        self.evaluator = PatternEvaluator.load(weights) if weights is not None else Evaluator()
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.max_depth = max_depth
+        self.table = SharedTranspositionTable(table_size)
+        self.stop = multiprocessing.Event()
+        options = {"time_limit": time_limit, "node_limit": node_limit,
+                   "max_depth": max_depth, "table_size": table_size, "weights": weights}
+        self.conns = []
+        self.processes = []
+        for i in range(workers):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_work, daemon=True,
+                                              args=(child, self.table.name, options, i % 2,
+                                                    self.stop if i > 0 else None))
+            process.start()
+            self.conns.append(parent)
+            self.processes.append(process)
+        self.nodes = 0
+        self.depth = 0
+        self.score = 0
+        self.elapsed = 0.0
+    
+    def search(self, board: Board, c: Color) -> int:
+        ''' This method searches the best move of the given player.
+        
+        :param board: a board to search.  it is not changed.
+        :param c: the color of this turn's player
+        :return: a bit of the best square, or 0 if there is no valid square
+        '''
+        assert board.side is c
+        start = time.perf_counter()
+        position = Position.from_board(board)
+        for conn in self.conns:
+            conn.send(position)
+        results = [self.conns[0].recv()]
+        self.stop.set()
+        results += [conn.recv() for conn in self.conns[1:]]
+        self.stop.clear()
+        
+        best = results[0]
+        for result in results[1:]:
+            if result[1] > best[1]:
+                best = result
+        m, self.depth, self.score = best[:3]
+        self.nodes = sum(result[3] for result in results)
+        # probes are counted by the copy of the table in each worker
+        self.table.hits += sum(result[4] for result in results)
+        self.table.misses += sum(result[5] for result in results)
+        self.elapsed = time.perf_counter() - start
+        return m
+    
+    def close(self) -> None:
+        ''' This method stops the worker processes and frees the table.
+        '''
+        for conn in self.conns:
+            conn.send(None)
+        for process in self.processes:
+            process.join()
+        self.table.close(unlink=True)
@@ -0,0 +1,77 @@
+# ==========================================================
+# ponder.py
+# Copyright (C) 2023 Kei Shioda.  All rights reserved.
+# ==========================================================
+''' This module defines pondering, thinking of the opponent player
+during the user's turn.
+'''
+from __future__ import annotations
+from reversi.model import Board, Color, Opponent
+from reversi.search import Searcher, ordered
+import threading
+
+class Ponderer:
+    ''' This class searches replies of the opponent player to likely moves
+    of the user on a worker thread while the user is choosing a move.
+    
+    Results are kept by hashes of the situations after the user's moves.
+    The search shares the transposition table of the opponent player, so
+    his search after a wrong guess still reuses the pondered results.
+    '''
+    def __init__(self, opponent: Opponent) -> Ponderer:
+        ''' This method creates an instance.
+        
+        :param opponent: the opponent player
+        :return: a created instance
+        '''
+        s = opponent.searcher
+        self.searcher = Searcher(s.evaluator.copy(), s.time_limit, s.node_limit, s.max_depth, s.table)
+        self.color = opponent.color
+        self.results = {}
+        self.thread = None
+    
+    def start(self, board: Board, c: Color) -> None:
+        ''' This method starts pondering.
+        
+        :param board: the current board.  it is not changed.
+        :param c: the color of the user
+        '''
+        self.stop()
+        self.results = {}
+        self.searcher.interrupt = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(board.copy(), c), daemon=True)
+        self.thread.start()
+    
+    def stop(self) -> None:
+        ''' This method stops pondering and waits for the worker thread.
+        '''
+        if self.thread is None:
+            return
+        self.searcher.interrupt.set()
+        self.thread.join()
+        self.thread = None
+    
+    def get(self, board: Board) -> int:
+        ''' This method returns the pondered move for the given situation.
+        
+        :param board: the current board
+        :return: a bit of the pondered move, or 0 if it was not pondered
+        '''
+        return self.results.get(board.hash, 0)
+    
+    def _run(self, board: Board, c: Color) -> None:
+        ''' This method searches replies to the user's moves in order of
+        likelihood until all of them are searched or pondering is stopped.
+        
+        :param board: a copy of the current board
+        :param c: the color of the user
+        '''
+        moves = board.get_moves(c)
+        for m in list(ordered(moves, board.geometry.order)) if moves else [0]:
+            if self.searcher.interrupt.is_set():
+                break
+            record = board.put(m, c) if m else board.pass_move(c)
+            best = self.searcher.search(board, self.color)
+            if best and not self.searcher.interrupt.is_set():
+                self.results[board.hash] = best
+            board.unmake_move(record)
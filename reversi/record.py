@@ -0,0 +1,133 @@
+# ==========================================================
+# record.py
+# Copyright (C) 2023 Kei Shioda.  All rights reserved.
+# ==========================================================
+''' This module defines a compact binary format of game records.
+
+A record file consists of a header and records.  A record is framed by
+its length and has a small header, the names of the players and a byte
+for each move, the index of the square or PASS.  Only games on boards
+of bitboard.SIZE can be recorded.
+
+    file:   MAGIC, VERSION, reserved
+    record: length, winner, black, white, length of each name,
+            names in UTF-8, moves
+'''
+from __future__ import annotations
+from reversi import bitboard
+from reversi.model import Board, Color
+import struct
+
+MAGIC = b'RVGR'
+VERSION = 1
+HEADER = struct.Struct('>4sHH')
+FRAME = struct.Struct('>H')
+RECORD = struct.Struct('>BBBBB')
+
+# a byte of a pass
+PASS = 64
+
+class RecordWriter:
+    ''' This class appends game records to a record file.
+    '''
+    def __init__(self, path: str) -> RecordWriter:
+        ''' This method opens a record file.  A new file gets the header.
+        
+        :param path: a path of the record file
+        :return: a created instance
+        '''
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(HEADER.pack(MAGIC, VERSION, 0))
+    
+    def write(self, moves, black: int, white: int, winner: Color = None,
+              players: tuple = ("", "")) -> None:
+        ''' This method appends a game record.
+        
+        :param moves: square indices of moves from the initial situation.
+                      a pass is None.
+        :param black: the final number of black discs
+        :param white: the final number of white discs
+        :param winner: the color of the winner, NONE for a draw,
+                       or None to decide it by the numbers of discs
+        :param players: names of the black player and the white player,
+                        each of at most 255 bytes in UTF-8
+        '''
+        if winner is None:
+            if black > white:
+                winner = Color.BLACK
+            elif white > black:
+                winner = Color.WHITE
+            else:
+                winner = Color.NONE
+        names = [name.encode() for name in players]
+        if any(len(name) > 255 for name in names):
+            raise ValueError("a name of a player must be at most 255 bytes in UTF-8")
+        moves = list(moves)
+        if any(m is not None and not 0 <= m < PASS for m in moves):
+            raise ValueError("only games on boards of %dx%d can be recorded"
+                             % (bitboard.SIZE, bitboard.SIZE))
+        body = bytes(PASS if m is None else m for m in moves)
+        header = RECORD.pack(winner.value, black, white, len(names[0]), len(names[1]))
+        self.file.write(FRAME.pack(len(header) + len(names[0]) + len(names[1]) + len(body)))
+        self.file.write(header + names[0] + names[1] + body)
+    
+    def close(self) -> None:
+        ''' This method closes the record file.
+        '''
+        self.file.close()
+
+def read(path: str):
+    ''' This method yields game records of a record file one by one
+    without loading the whole file.
+    
+    :param path: a path of the record file
+    :return: a generator of dictionaries of the names of the players,
+             the winner, the numbers of discs and the moves.  a pass
+             in the moves is None.
+    '''
+    with open(path, 'rb') as f:
+        magic, version, _ = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(path + " is not a record file")
+        while frame := f.read(FRAME.size):
+            length, = FRAME.unpack(frame)
+            data = f.read(length)
+            if len(data) < length:
+                raise ValueError(path + " is truncated")
+            winner, black, white, n, m = RECORD.unpack_from(data)
+            names = data[RECORD.size:RECORD.size + n + m]
+            yield {"players": (names[:n].decode(), names[n:].decode()),
+                   "winner": Color(winner),
+                   "black": black,
+                   "white": white,
+                   "moves": [None if k == PASS else k for k in data[RECORD.size + n + m:]]}
+
+def replay(moves):
+    ''' This method plays moves on a board of bitboard.SIZE from the
+    initial situation.
+    
+    :param moves: square indices of moves.  a pass is None.
+    :return: a generator of the board after each move.  the same board
+             is yielded and changed by the next move.
+    '''
+    board = Board()
+    c = Color.BLACK
+    for index in moves:
+        if index is None:
+            board.pass_move(c)
+        elif board.put(1 << index, c) is None:
+            raise ValueError("invalid move %d" % index)
+        c = Color.get_opponent(c)
+        yield board
+
+def get_moves(board: Board) -> list:
+    ''' This method converts the history of a board into moves of a record.
+    
+    :param board: a board of bitboard.SIZE
+    :return: a list of square indices of the moves.  a pass is None.
+    '''
+    if board.size != bitboard.SIZE:
+        raise ValueError("only games on boards of %dx%d can be recorded"
+                         % (bitboard.SIZE, bitboard.SIZE))
+    return [r[0].bit_length() - 1 if r[0] else None for r in board.history]
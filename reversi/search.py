@@ -0,0 +1,300 @@
+# ==========================================================
+# search.py
+# Copyright (C) 2023 Kei Shioda.  All rights reserved.
+# ==========================================================
+''' This module defines a game tree search for the opponent player.
+'''
+from __future__ import annotations
+from reversi import bitboard
+from reversi.model import Board, Color, Position
+from reversi.evaluate import Evaluator
+from reversi.ttable import TranspositionTable, Bound
+import time
+
+CORNERS = 0x8100000000000081
+X_SQUARES = 0x0042000000004200
+C_SQUARES = 0x4281000000008142
+EDGES = 0x3c0081818181003c
+ORDER = [CORNERS,
+         EDGES,
+         bitboard.FULL & ~(CORNERS | X_SQUARES | C_SQUARES | EDGES),
+         C_SQUARES,
+         X_SQUARES]
+
+def ordered(moves: int, order: list = ORDER):
+    ''' This method yields bits of moves from promising squares.
+    
+    :param moves: a board of valid squares
+    :param order: masks of squares from promising ones.  the default is
+                  of 8x8 boards.
+    '''
+    for mask in order:
+        b = moves & mask
+        while b:
+            m = b & -b
+            yield m
+            b ^= m
+
+class Searcher:
+    ''' This class searches the best move by negamax with alpha-beta
+    pruning and iterative deepening.
+    
+    The search stops when the time limit or the node limit is exceeded,
+    or interrupt (a threading.Event) is set from another thread,
+    and the best move of the last completed depth is used.
+    '''
+    INFINITY = 1 << 30
+    DISC_SCORE = 1000
+    CHECK_INTERVAL = 1024
+    
+    def __init__(self, evaluator: Evaluator = None, time_limit: float = None,
+                 node_limit: int = None, max_depth: int = 60,
+                 table: TranspositionTable = None) -> Searcher:
+        ''' This method creates an instance.
+        
+        :param evaluator: an evaluator of leaf nodes
+        :param table: a transposition table shared by searches
+        :param time_limit: seconds spent on a search, or None for no limit
+        :param node_limit: nodes visited in a search, or None for no limit
+        :param max_depth: the maximum depth of iterative deepening
+        :return: a created instance
+        '''
+        self.evaluator = evaluator if evaluator is not None else Evaluator()
+        self.table = table if table is not None else TranspositionTable()
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.max_depth = max_depth
+        self.nodes = 0
+        self.depth = 0
+        self.score = 0
+        self.elapsed = 0.0
+        self.stopped = False
+        self.interrupt = None
+        self.geometry = bitboard.get_geometry()
+    
+    def search(self, board: Board, c: Color) -> int:
+        ''' This method searches the best move of the given player.
+        
+        :param board: a board to search.  it is restored after the search.
+        :param c: the color of this turn's player
+        :return: a bit of the best square, or 0 if there is no valid square
+        '''
+        assert board.side is c
+        moves = self._start(board, c)
+        if len(moves) == 0:
+            return 0
+        
+        best = moves[0]
+        p, o = board.get_discs(c)
+        empties = self.geometry.squares - (p | o).bit_count()
+        for depth in range(1, min(self.max_depth, empties) + 1):
+            scores = self._search_root(board, c, moves, depth)
+            if self.stopped:
+                break
+            moves.sort(key=lambda m: -scores[m])
+            best = moves[0]
+            self.score = scores[best]
+            self.depth = depth
+            self.can_stop = True
+            if self._is_over():
+                break
+        
+        self.elapsed = time.perf_counter() - self.start
+        return best
+    
+    def analyze(self, position: Position):
+        ''' This method searches every move of a position by iterative
+        deepening and yields their scores after each depth.
+        
+        Unlike search, the score of every move is exact.  The table and
+        the order of moves are kept between depths, and the board is not
+        in the middle of a search while the generator is suspended, so
+        the caller can stop at any depth by leaving the generator.  The
+        limits of the searcher apply to the whole analysis, but the first
+        depth is always completed.
+        
+        :param position: a position to analyze
+        :return: a generator of dictionaries of the depth, scores of
+                 moves from the side of the player to move, whose keys are
+                 bits of the squares, in descending order, the best move,
+                 the number of visited nodes and elapsed seconds.  nothing
+                 is yielded if there is no valid square.
+        '''
+        board = position.to_board()
+        c = position.side
+        moves = self._start(board, c)
+        if len(moves) == 0:
+            return
+        
+        opponent = Color.get_opponent(c)
+        p, o = position.get_discs()
+        empties = self.geometry.squares - (p | o).bit_count()
+        for depth in range(1, min(self.max_depth, empties) + 1):
+            scores = {}
+            for m in moves:
+                record = board.put(m, c)
+                self.evaluator.push(record)
+                scores[m] = -self._negamax(board, opponent, depth - 1, -self.INFINITY, self.INFINITY, False)
+                self.evaluator.pop(record)
+                board.unmake_move(record)
+                if self.stopped:
+                    return
+            moves.sort(key=lambda m: -scores[m])
+            self.score = scores[moves[0]]
+            self.depth = depth
+            self.can_stop = True
+            self.elapsed = time.perf_counter() - self.start
+            yield {"depth": depth,
+                   "scores": {m: scores[m] for m in moves},
+                   "best": moves[0],
+                   "nodes": self.nodes,
+                   "time": self.elapsed}
+            if self._is_over():
+                return
+    
+    def _start(self, board: Board, c: Color) -> list:
+        ''' This method resets the statistics and the limits of a new
+        search and prepares the evaluator for the given board.
+        
+        :param board: a board to search
+        :param c: the color of this turn's player
+        :return: a list of bits of valid squares in order of promise
+        '''
+        self.geometry = board.geometry
+        p, o = board.get_discs(c)
+        moves = list(ordered(self.geometry.get_moves(p, o), self.geometry.order))
+        self.start = time.perf_counter()
+        self.deadline = None if self.time_limit is None else self.start + self.time_limit
+        self.nodes = 0
+        self.depth = 0
+        self.score = 0
+        self.stopped = False
+        self.can_stop = False
+        self.table.new_search()
+        if len(moves) > 0:
+            self.evaluator.reset(board)
+        return moves
+    
+    def _search_root(self, board: Board, c: Color, moves: list, depth: int) -> dict:
+        ''' This method searches each move of the root node.
+        
+        :param board: a board to search
+        :param c: the color of this turn's player
+        :param moves: bits of valid squares ordered by the previous depth
+        :param depth: a depth of this iteration
+        :return: a dictionary of scores of moves.  the scores except the
+                 best one are upper bounds.
+        '''
+        scores = {}
+        alpha = -self.INFINITY
+        opponent = Color.get_opponent(c)
+        for m in moves:
+            record = board.put(m, c)
+            self.evaluator.push(record)
+            score = -self._negamax(board, opponent, depth - 1, -self.INFINITY, -alpha, False)
+            self.evaluator.pop(record)
+            board.unmake_move(record)
+            if self.stopped:
+                break
+            scores[m] = score
+            if score > alpha:
+                alpha = score
+        return scores
+    
+    def _negamax(self, board: Board, c: Color, depth: int, alpha: int, beta: int, passed: bool) -> int:
+        ''' This method evaluates a node by negamax with alpha-beta pruning.
+        
+        :param board: a board to search
+        :param c: the color of this turn's player
+        :param depth: the remaining depth
+        :param alpha: the lower bound of the window
+        :param beta: the upper bound of the window
+        :param passed: if the previous turn was passed, set true
+        :return: a score from the side of this turn's player
+        '''
+        self.nodes += 1
+        if self.nodes % self.CHECK_INTERVAL == 0 and self._is_over():
+            self.stopped = True
+        if self.stopped:
+            return 0
+        
+        p, o = board.get_discs(c)
+        moves = self.geometry.get_moves(p, o)
+        if moves == 0:
+            if passed:
+                return (p.bit_count() - o.bit_count()) * self.DISC_SCORE
+            record = board.pass_move(c)
+            self.evaluator.push(record)
+            score = -self._negamax(board, Color.get_opponent(c), depth, -beta, -alpha, True)
+            self.evaluator.pop(record)
+            board.unmake_move(record)
+            return score
+        
+        if depth <= 0:
+            return self.evaluator.evaluate(p, o)
+        
+        h = board.hash
+        first = 0
+        entry = self.table.probe(h)
+        if entry is not None:
+            stored_depth, bound, score, first = entry
+            if stored_depth >= depth:
+                if bound == Bound.EXACT:
+                    return score
+                if bound == Bound.LOWER and score >= beta:
+                    return score
+                if bound == Bound.UPPER and score <= alpha:
+                    return score
+            first &= moves
+        
+        opponent = Color.get_opponent(c)
+        original = alpha
+        best = -self.INFINITY
+        best_move = 0
+        for m in self._ordered(moves, first):
+            record = board.put(m, c)
+            self.evaluator.push(record)
+            score = -self._negamax(board, opponent, depth - 1, -beta, -alpha, False)
+            self.evaluator.pop(record)
+            board.unmake_move(record)
+            if score > best:
+                best = score
+                best_move = m
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        
+        if not self.stopped:
+            if best <= original:
+                bound = Bound.UPPER
+            elif best >= beta:
+                bound = Bound.LOWER
+            else:
+                bound = Bound.EXACT
+            self.table.store(h, depth, bound, best, best_move)
+        return best
+    
+    def _ordered(self, moves: int, first: int):
+        ''' This method yields bits of moves beginning with the given one.
+        
+        :param moves: a board of valid squares
+        :param first: a bit of the move tried first, or 0
+        '''
+        if first:
+            yield first
+        yield from ordered(moves & ~first, self.geometry.order)
+    
+    def _is_over(self) -> bool:
+        ''' This method checks whether the budget of this search is used up.
+        
+        :return: if the search must stop, return true,
+                 otherwise, return false
+        '''
+        if not self.can_stop:
+            return False
+        if self.interrupt is not None and self.interrupt.is_set():
+            return True
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            return True
+        return self.deadline is not None and time.perf_counter() >= self.deadline
@@ -0,0 +1,127 @@
+# ==========================================================
+# selfplay.py
+# Copyright (C) 2023 Kei Shioda.  All rights reserved.
+# ==========================================================
+''' This module defines a headless runner of games between opponent
+players on a process pool.
+'''
+from __future__ import annotations
+from reversi.model import Color, Game, Opponent
+from reversi.record import RecordWriter, get_moves
+import json
+import multiprocessing
+import random
+import sys
+import time
+
+def play_game(task: tuple) -> dict:
+    ''' This method plays a game between two opponent players.
+    
+    :param task: a tuple of the number of the game, a random seed and
+                 a dictionary of options
+    :return: a dictionary of the number of the game, the numbers of
+             discs, the moves and the elapsed seconds
+    '''
+    index, seed, options = task
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    game = Game()
+    players = {}
+    for c, engine in zip((Color.BLACK, Color.WHITE), options["engines"]):
+        players[c] = Opponent(game, c, time_limit=options["time_limit"],
+                              node_limit=options["node_limit"], max_depth=options["depth"],
+                              table_size=options["table_size"],
+                              endgame_empties=options["endgame_empties"], engine=engine)
+    
+    c = Color.BLACK
+    ply = 0
+    while not game.is_finished():
+        valid = game.get_valid(c)
+        if ply < options["random_plies"] and len(valid) > 0:
+            (x, y), n = rng.choice(valid)
+            game.put_disc(x + 1, y + 1, c)
+        else:
+            players[c].move()
+        c = Color.get_opponent(c)
+        ply += 1
+    
+    black, white = game.board.count()
+    moves = get_moves(game.board)
+    return {"game": index,
+            "black": black,
+            "white": white,
+            "moves": moves,
+            "time": time.perf_counter() - start}
+
+def run(games: int, workers: int = None, seed: int = 0, output=sys.stdout,
+        report=sys.stderr, record: str = None, **options) -> dict:
+    ''' This method plays games on a process pool and streams the results
+    as lines of JSON.
+    
+    :param games: the number of games
+    :param workers: the number of processes, or None for the number of CPUs
+    :param seed: a random seed of the games
+    :param output: a stream the results are written to, or None
+    :param report: a stream the progress is written to, or None
+    :param record: a path of a record file the games are appended to,
+                   or None
+    :param options: options of players. time_limit, node_limit, depth,
+                    table_size, endgame_empties, random_plies and engines,
+                    the engines of the black player and the white player.
+    :return: a dictionary of statistics of all games
+    '''
+    options.setdefault("time_limit", None)
+    options.setdefault("node_limit", None)
+    options.setdefault("depth", 2)
+    options.setdefault("table_size", 1)
+    options.setdefault("endgame_empties", 6)
+    options.setdefault("random_plies", 4)
+    options.setdefault("engines", ("search", "search"))
+    
+    # seeds of games are drawn from the seed of the run, so that runs of
+    # different seeds share no games
+    rng = random.Random(seed)
+    tasks = ((i, rng.getrandbits(64), options) for i in range(games))
+    stats = {"games": 0, "moves": 0, "black": 0, "white": 0, "draw": 0}
+    writer = RecordWriter(record) if record is not None else None
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        for result in pool.imap_unordered(play_game, tasks, chunksize=4):
+            if output is not None:
+                output.write(json.dumps(result) + "\n")
+            if writer is not None:
+                writer.write(result["moves"], result["black"], result["white"],
+                             players=("selfplay", "selfplay"))
+            stats["games"] += 1
+            stats["moves"] += sum(1 for m in result["moves"] if m is not None)
+            if result["black"] > result["white"]:
+                stats["black"] += 1
+            elif result["white"] > result["black"]:
+                stats["white"] += 1
+            else:
+                stats["draw"] += 1
+            if report is not None and stats["games"] % 100 == 0:
+                _report(report, stats, time.perf_counter() - start)
+    
+    if writer is not None:
+        writer.close()
+    elapsed = time.perf_counter() - start
+    stats["time"] = elapsed
+    stats["games_per_sec"] = stats["games"] / elapsed if elapsed > 0 else 0.0
+    stats["moves_per_sec"] = stats["moves"] / elapsed if elapsed > 0 else 0.0
+    if report is not None:
+        _report(report, stats, elapsed)
+    return stats
+
+def _report(report, stats: dict, elapsed: float) -> None:
+    ''' This method writes the progress of games.
+    
+    :param report: a stream the progress is written to
+    :param stats: a dictionary of statistics of finished games
+    :param elapsed: elapsed seconds
+    '''
+    elapsed = max(elapsed, 1e-9)
+    report.write("%d games (black %d, white %d, draw %d), %.1f games/sec, %.1f moves/sec\n"
+                 % (stats["games"], stats["black"], stats["white"], stats["draw"],
+                    stats["games"] / elapsed, stats["moves"] / elapsed))
+    report.flush()
@@ -0,0 +1,296 @@
+# ==========================================================
+# server.py
+# Copyright (C) 2023 Kei Shioda.  All rights reserved.
+# ==========================================================
+''' This module defines a server hosting many games in one process.
+
+A client sends requests as lines of JSON over TCP or a Unix socket and
+receives a line of JSON for each request.  A request has a command and,
+except for "new", the number of a game.
+
+    {"command": "new", "color": "BLACK"}
+    {"command": "put", "game": 1, "x": 3, "y": 4}
+    {"command": "pass", "game": 1}
+    {"command": "surrender", "game": 1}
+    {"command": "undo", "game": 1}
+    {"command": "show", "game": 1}
+    {"command": "close", "game": 1}
+
+The value of "id" in a request, if any, is copied to its response.
+States of a game follow those of Controller.  Thinking of the opponent
+players runs on a process pool, so the event loop keeps serving other
+games meanwhile.
+'''
+from __future__ import annotations
+from reversi import bitboard
+from reversi.model import State, Color, Game, Player, Opponent, Position
+from reversi.book import OpeningBook
+from reversi.view import ErrorView
+import asyncio
+import concurrent.futures
+import itertools
+import json
+import traceback
+
+# the game and the opponent players of a worker process
+_game = None
+_players = {}
+
+def _init_worker(options: dict) -> None:
+    ''' This method creates the opponent players of a worker process.
+    
+    :param options: options of players. time_limit, node_limit, max_depth,
+                    table_size, endgame_empties and book, a path of
+                    an opening book file.
+    '''
+    global _game
+    options = dict(options)
+    path = options.pop("book", None)
+    book = OpeningBook(path) if path is not None else None
+    _game = Game()
+    for c in (Color.BLACK, Color.WHITE):
+        _players[c] = Opponent(_game, c, book=book, **options)
+
+def think(position: Position) -> int:
+    ''' This method lets an opponent player choose a move in a worker
+    process.
+    
+    :param position: a position whose player to move is the opponent player
+    :return: a bit of the chosen move, or 0 if he passes
+    '''
+    _game.set_position(position)
+    if not _players[position.side].move():
+        return 0
+    return _game.board.history[-1][0]
+
+class Session:
+    ''' This class holds a game between a client and an opponent player.
+    '''
+    def __init__(self, number: int, c: Color) -> Session:
+        ''' This method creates an instance.
+        
+        :param number: the number of the game
+        :param c: the color of the user
+        :return: a created instance
+        '''
+        self.number = number
+        self.game = Game()
+        self.usercolor = c
+        self.user = Player(self.game, c)
+        self.state = State.USER if c is Color.BLACK else State.OPPONENT
+        self.lock = asyncio.Lock()
+    
+    def to_dict(self) -> dict:
+        ''' This method describes the current situation of the game.
+        
+        :return: a dictionary of the number of the game, the state,
+                 rows of the board, the numbers of discs and the result
+        '''
+        marks = {Color.BLACK: "B", Color.WHITE: "W", Color.NONE: "-"}
+        black, white = self.game.board.count()
+        return {"game": self.number,
+                "state": self.state.name,
+                "color": Color.to_str(self.usercolor),
+                "board": ["".join(marks[c] for c in row) for row in self.game.get_board_situation()],
+                "black": black,
+                "white": white,
+                "result": self.game.get_result().name if self.state is State.RESULT else None}
+
+class Server:
+    ''' This class serves games to clients.
+    
+    Games are held by the connections which created them and are closed
+    when the connections are lost.
+    '''
+    def __init__(self, workers: int = None, **options) -> Server:
+        ''' This method creates an instance.
+        
+        :param workers: the number of processes of thinking,
+                        or None for the number of CPUs
+        :param options: options of opponent players. see _init_worker.
+        :return: a created instance
+        '''
+        self.workers = workers
+        self.options = options
+        self.executor = None
+        self.sessions = {}
+        self.numbers = itertools.count(1)
+    
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, path: str = None) -> None:
+        ''' This method serves games until it is cancelled.
+        
+        :param host: a host name to listen on
+        :param port: a port number to listen on
+        :param path: a path of a Unix socket.  if given, host and port
+                     are ignored.
+        '''
+        with concurrent.futures.ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                                    initargs=(self.options,)) as self.executor:
+            if path is not None:
+                server = await asyncio.start_unix_server(self._handle, path)
+            else:
+                server = await asyncio.start_server(self._handle, host, port)
+            async with server:
+                await server.serve_forever()
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        ''' This method serves a connection.  Each request is handled
+        by its own task, so a game waiting for thinking does not block
+        the other games of the connection.
+        
+        :param reader: a stream of requests
+        :param writer: a stream of responses
+        '''
+        owned = set()
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(self._respond(line, owned, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        except ConnectionError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            for number in owned:
+                self.sessions.pop(number, None)
+            writer.close()
+    
+    async def _respond(self, line: bytes, owned: set, writer: asyncio.StreamWriter) -> None:
+        ''' This method handles a request and writes its response.
+        
+        :param line: a line of the request
+        :param owned: numbers of games of the connection
+        :param writer: a stream of responses
+        '''
+        request = {}
+        try:
+            request = json.loads(line)
+            response = await self.dispatch(request, owned)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            response = {"error": "the request is invalid"}
+        except Exception as e:
+            # the connection is kept, and the failure is left in the log
+            traceback.print_exc()
+            response = {"error": "the request failed: %s" % e}
+        if isinstance(request, dict) and "id" in request:
+            response["id"] = request["id"]
+        writer.write((json.dumps(response) + "\n").encode())
+        await writer.drain()
+    
+    async def dispatch(self, request: dict, owned: set) -> dict:
+        ''' This method carries out a request.
+        
+        :param request: a dictionary of the request
+        :param owned: numbers of games of the connection
+        :return: a dictionary of the response
+        '''
+        command = request["command"]
+        if command == "new":
+            c = Color[request.get("color", "BLACK").upper()]
+            if c is Color.NONE:
+                raise ValueError(c)
+            session = Session(next(self.numbers), c)
+            self.sessions[session.number] = session
+            owned.add(session.number)
+            async with session.lock:
+                await self._do_opponent_turn(session)
+                return session.to_dict()
+        
+        number = request["game"]
+        if number not in owned:
+            return {"game": number, "error": "there is no such game"}
+        session = self.sessions[number]
+        async with session.lock:
+            match command:
+                case "show":
+                    return session.to_dict()
+                case "close":
+                    owned.discard(number)
+                    del self.sessions[number]
+                    return {"game": number, "state": State.EXIT.name}
+            if session.state is not State.USER:
+                return {"game": number, "error": "the game is finished"}
+            
+            code = self._do_user_turn(session, command, request)
+            if code is not None:
+                response = session.to_dict()
+                response["error"] = ErrorView.MESSAGES[code]
+                return response
+            await self._do_opponent_turn(session)
+            return session.to_dict()
+    
+    def _do_user_turn(self, session: Session, command: str, request: dict) -> int:
+        ''' This method takes an action of the user as Controller does.
+        
+        :param session: the game
+        :param command: the action
+        :param request: a dictionary of the request
+        :return: a code of ErrorView if the action is invalid, or None
+        '''
+        match command:
+            case "put":
+                x, y = int(request["x"]), int(request["y"])
+                if x > 0 and x < 9 and y > 0 and y < 9 and session.user.put_disc(x, y):
+                    session.state = State.OPPONENT
+                else:
+                    return 1
+            case "pass":
+                if not session.user.take_pass():
+                    return 2
+                if session.game.is_finished():
+                    session.game.set_result(True, session.usercolor)
+                    session.state = State.RESULT
+                else:
+                    session.state = State.OPPONENT
+            case "surrender":
+                session.user.surrender(True)
+                session.state = State.RESULT
+            case "undo":
+                if not session.user.undo():
+                    return 4
+            case _:
+                raise ValueError(command)
+        return None
+    
+    async def _do_opponent_turn(self, session: Session) -> None:
+        ''' This method lets the opponent player take an action on
+        the process pool if it is his turn.
+        
+        :param session: the game
+        '''
+        if session.state is not State.OPPONENT:
+            return
+        c = Color.get_opponent(session.usercolor)
+        loop = asyncio.get_running_loop()
+        m = await loop.run_in_executor(self.executor, think, session.game.get_position())
+        if m:
+            x, y = bitboard.to_coordinate(m.bit_length() - 1)
+            assert session.game.put_disc(x + 1, y + 1, c) == True
+            session.state = State.USER
+        else:
+            session.game.take_pass(c)
+            if session.game.is_finished():
+                session.game.set_result(False, c)
+                session.state = State.RESULT
+            else:
+                session.state = State.USER
+
+def run(host: str = "127.0.0.1", port: int = 8765, path: str = None,
+        workers: int = None, **options) -> None:
+    ''' This method runs a server until it is interrupted.
+    
+    :param host: a host name to listen on
+    :param port: a port number to listen on
+    :param path: a path of a Unix socket, or None to listen on TCP
+    :param workers: the number of processes of thinking,
+                    or None for the number of CPUs
+    :param options: options of opponent players. see _init_worker.
+    '''
+    try:
+        asyncio.run(Server(workers, **options).serve(host, port, path))
+    except KeyboardInterrupt:
+        pass
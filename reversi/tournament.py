@@ -0,0 +1,279 @@
+# ==========================================================
+# tournament.py
+# Copyright (C) 2023 Kei Shioda.  All rights reserved.
+# ==========================================================
+''' This module defines a match between two configurations of opponent
+players on a process pool.
+
+Games start from balanced openings, and each opening is played twice
+with the colors swapped.  The results are streamed into an Elo estimate
+and a sequential probability ratio test (SPRT), which stops the match as
+soon as either hypothesis is accepted.
+'''
+from __future__ import annotations
+from reversi import bitboard
+from reversi.model import Color, Game, Opponent, Position
+from reversi.search import Searcher
+import json
+import math
+import multiprocessing
+import random
+import sys
+import time
+
+def get_openings(n: int, plies: int = 6, depth: int = 4, margin: int = 20,
+                 seed: int = 0) -> list:
+    ''' This method collects balanced openings by random moves.  An
+    opening is balanced when a shallow search scores it within a margin.
+    Openings which are symmetries of each other are collected only once.
+    
+    :param n: the number of openings
+    :param plies: plies played randomly from the initial position
+    :param depth: the depth of the search
+    :param margin: the maximum absolute score of the evaluator, in which
+                   a corner is worth 100
+    :param seed: a random seed
+    :return: a list of positions
+    '''
+    rng = random.Random(seed)
+    searcher = Searcher(max_depth=depth)
+    game = Game()
+    openings = []
+    seen = set()
+    for i in range(n * 1000):
+        if len(openings) >= n:
+            break
+        position = Position()
+        for ply in range(plies):
+            moves = list(bitboard.iter_masks(position.get_moves()))
+            position = position.play(rng.choice(moves) if moves else 0)
+        key = bitboard.get_canonical(*position.get_discs())[:2]
+        if position.get_moves() == 0 or key in seen:
+            continue
+        seen.add(key)
+        game.set_position(position)
+        searcher.search(game.board, position.side)
+        if abs(searcher.score) <= margin:
+            openings.append(position)
+    return openings
+
+def play_game(task: tuple) -> dict:
+    ''' This method plays a game between two configurations from an
+    opening.
+    
+    :param task: a tuple of the number of the game, the number of the
+                 opening, the opening, options of the first and the
+                 second configuration, and the color of the first one
+    :return: a dictionary of the numbers, the color of the first
+             configuration, the numbers of discs, the score of the first
+             configuration and the elapsed seconds
+    '''
+    index, number, opening, options, first = task
+    start = time.perf_counter()
+    game = Game()
+    game.set_position(opening)
+    players = {first: Opponent(game, first, **options[0])}
+    second = Color.get_opponent(first)
+    players[second] = Opponent(game, second, **options[1])
+    
+    c = opening.side
+    while not game.is_finished():
+        players[c].move()
+        c = Color.get_opponent(c)
+    for player in players.values():
+        player.close()
+    
+    black, white = game.board.count()
+    diff = black - white if first is Color.BLACK else white - black
+    return {"game": index,
+            "opening": number,
+            "first": first.name,
+            "black": black,
+            "white": white,
+            "score": 1.0 if diff > 0 else 0.0 if diff < 0 else 0.5,
+            "time": time.perf_counter() - start}
+
+class MatchStats:
+    ''' This class accumulates scores of games of the first configuration
+    and estimates the difference of Elo ratings.
+    
+    The SPRT uses the normal approximation of the log-likelihood ratio
+    with the variance of the observed scores.
+    '''
+    def __init__(self, elo0: float = 0.0, elo1: float = 10.0,
+                 alpha: float = 0.05, beta: float = 0.05) -> MatchStats:
+        ''' This method creates an instance.
+        
+        :param elo0: the Elo difference of the null hypothesis
+        :param elo1: the Elo difference of the alternative hypothesis
+        :param alpha: the probability of accepting H1 when H0 is true
+        :param beta: the probability of accepting H0 when H1 is true
+        :return: a created instance
+        '''
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+    
+    def add(self, score: float) -> None:
+        ''' This method adds a result of a game.
+        
+        :param score: 1 for a win, 0.5 for a draw and 0 for a loss
+        '''
+        if score > 0.5:
+            self.wins += 1
+        elif score < 0.5:
+            self.losses += 1
+        else:
+            self.draws += 1
+    
+    def get_games(self) -> int:
+        ''' This method returns the number of games.
+        
+        :return: the number of games
+        '''
+        return self.wins + self.draws + self.losses
+    
+    def get_score(self) -> tuple:
+        ''' This method computes the mean and the variance of scores.
+        
+        :return: a tuple of the mean and the variance of a game
+        '''
+        n = self.get_games()
+        if n == 0:
+            return (0.5, 0.0)
+        mean = (self.wins + self.draws / 2) / n
+        square = (self.wins + self.draws / 4) / n
+        return (mean, square - mean * mean)
+    
+    def get_elo(self) -> tuple:
+        ''' This method estimates the Elo difference of the first
+        configuration.
+        
+        :return: a tuple of the estimate and the margin of its 95%
+                 confidence interval
+        '''
+        mean, variance = self.get_score()
+        deviation = math.sqrt(variance / max(self.get_games(), 1))
+        lower = _to_elo(mean - 1.96 * deviation)
+        upper = _to_elo(mean + 1.96 * deviation)
+        return (_to_elo(mean), (upper - lower) / 2)
+    
+    def get_llr(self) -> float:
+        ''' This method computes the log-likelihood ratio of H1 to H0.
+        
+        :return: the log-likelihood ratio
+        '''
+        mean, variance = self.get_score()
+        if variance <= 0:
+            return 0.0
+        s0 = _to_score(self.elo0)
+        s1 = _to_score(self.elo1)
+        return self.get_games() * (s1 - s0) * (2 * mean - s0 - s1) / (2 * variance)
+    
+    def get_result(self) -> str:
+        ''' This method tells the result of the SPRT.
+        
+        :return: "H1" if H1 is accepted, "H0" if H0 is accepted,
+                 otherwise, None
+        '''
+        llr = self.get_llr()
+        if llr >= self.upper:
+            return "H1"
+        if llr <= self.lower:
+            return "H0"
+        return None
+
+def _to_score(elo: float) -> float:
+    ''' This method converts an Elo difference into the expected score.
+    
+    :param elo: an Elo difference
+    :return: the expected score of a game
+    '''
+    return 1 / (1 + 10 ** (-elo / 400))
+
+def _to_elo(score: float) -> float:
+    ''' This method converts an expected score into an Elo difference.
+    
+    :param score: an expected score of a game
+    :return: an Elo difference.  it is bounded by a score of 0.001.
+    '''
+    score = min(max(score, 0.001), 0.999)
+    return -400 * math.log10(1 / score - 1)
+
+def run(first: dict, second: dict, pairs: int = 500, workers: int = None, seed: int = 0,
+        output=sys.stdout, report=sys.stderr, plies: int = 6, elo0: float = 0.0,
+        elo1: float = 10.0, alpha: float = 0.05, beta: float = 0.05) -> dict:
+    ''' This method plays a match between two configurations on a process
+    pool and streams the results as lines of JSON.
+    
+    :param first: options of Opponent of the first configuration
+    :param second: options of Opponent of the second configuration
+    :param pairs: the maximum number of openings, each of which is
+                  played twice with the colors swapped
+    :param workers: the number of processes, or None for the number of CPUs
+    :param seed: a random seed of the openings
+    :param output: a stream the results are written to, or None
+    :param report: a stream the progress is written to, or None
+    :param plies: plies of the openings
+    :param elo0: the Elo difference of the null hypothesis
+    :param elo1: the Elo difference of the alternative hypothesis
+    :param alpha: the probability of accepting H1 when H0 is true
+    :param beta: the probability of accepting H0 when H1 is true
+    :return: a dictionary of the numbers of wins, draws and losses of the
+             first configuration, the Elo estimate, its margin, the
+             log-likelihood ratio and the result of the SPRT
+    '''
+    options = []
+    for config in (first, second):
+        config = dict(config)
+        config.setdefault("time_limit", None)
+        config.setdefault("max_depth", 2)
+        config.setdefault("table_size", 1)
+        config.setdefault("endgame_empties", 6)
+        options.append(config)
+    openings = get_openings(pairs, plies, seed=seed)
+    tasks = ((2 * i + k, i, opening, options, (Color.BLACK, Color.WHITE)[k])
+             for i, opening in enumerate(openings) for k in range(2))
+    
+    stats = MatchStats(elo0, elo1, alpha, beta)
+    result = None
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        for game in pool.imap_unordered(play_game, tasks):
+            if output is not None:
+                output.write(json.dumps(game) + "\n")
+            stats.add(game["score"])
+            result = stats.get_result()
+            if result is not None:
+                break
+            if report is not None and stats.get_games() % 20 == 0:
+                _report(report, stats, time.perf_counter() - start)
+    
+    elo, margin = stats.get_elo()
+    if report is not None and (result is not None or stats.get_games() % 20 != 0):
+        _report(report, stats, time.perf_counter() - start)
+    return {"wins": stats.wins,
+            "draws": stats.draws,
+            "losses": stats.losses,
+            "elo": elo,
+            "margin": margin,
+            "llr": stats.get_llr(),
+            "result": result,
+            "time": time.perf_counter() - start}
+
+def _report(report, stats: MatchStats, elapsed: float) -> None:
+    ''' This method writes the progress of a match.
+    
+    :param report: a stream the progress is written to
+    :param stats: statistics of finished games
+    :param elapsed: elapsed seconds
+    '''
+    elo, margin = stats.get_elo()
+    report.write("%d games (+%d =%d -%d), elo %.1f +- %.1f, llr %.2f [%.2f, %.2f], %.1f games/sec\n"
+                 % (stats.get_games(), stats.wins, stats.draws, stats.losses, elo, margin,
+                    stats.get_llr(), stats.lower, stats.upper, stats.get_games() / max(elapsed, 1e-9)))
+    report.flush()
@@ -0,0 +1,196 @@
+# ==========================================================
+# train.py
+# Copyright (C) 2023 Kei Shioda.  All rights reserved.
+# ==========================================================
+''' This module defines a training pipeline of weights of PatternEvaluator
+from record files.
+
+Situations of the games are streamed in chunks and their pattern codes
+are written to files in a cache directory, which are memory-mapped in
+the training.  A later run with the same record files reuses them.
+Weights of each phase are fitted to the final disc differences by
+stochastic gradient descent.  This module requires NumPy.
+'''
+from __future__ import annotations
+from reversi import batch, record
+from reversi.evaluate import PatternEvaluator, PATTERNS
+from reversi.model import Color
+from reversi.search import Searcher
+from array import array
+import json
+import numpy as np
+import os
+import sys
+import time
+
+class Trainer:
+    ''' This class extracts pattern codes of situations and fits weights.
+    '''
+    def __init__(self, cache: str, chunk: int = 1 << 16, report=sys.stderr) -> Trainer:
+        ''' This method creates an instance.
+        
+        :param cache: a directory the extracted codes are stored in
+        :param chunk: the number of situations processed at once
+        :param report: a stream the progress is written to, or None
+        :return: a created instance
+        '''
+        self.cache = cache
+        self.chunk = chunk
+        self.report = report
+        self.evaluator = PatternEvaluator()
+        sizes = [3 ** len(squares) for name, squares in PATTERNS]
+        self.offsets = np.cumsum([0] + sizes)
+        self.size = int(self.offsets[-1])
+        self.instances = len(self.evaluator.instances)
+        self.weights = np.zeros((PatternEvaluator.PHASES, self.size))
+    
+    def extract(self, paths: list) -> int:
+        ''' This method extracts codes of all situations of record files
+        unless the cache has them.
+        
+        :param paths: paths of record files
+        :return: the number of situations
+        '''
+        sources = [[os.path.abspath(path), os.path.getsize(path), os.path.getmtime(path)]
+                   for path in paths]
+        meta = os.path.join(self.cache, "meta.json")
+        if os.path.exists(meta):
+            with open(meta) as f:
+                cached = json.load(f)
+            if cached["sources"] == sources:
+                return cached["count"]
+        
+        os.makedirs(self.cache, exist_ok=True)
+        count = 0
+        start = time.perf_counter()
+        with open(self._path("codes"), "wb") as codes, \
+                open(self._path("phases"), "wb") as phases, \
+                open(self._path("targets"), "wb") as targets:
+            for p, o, diffs in self._read_chunks(paths):
+                empties = 64 - batch.count(p | o)
+                phase = np.minimum(empties // PatternEvaluator.EMPTIES_PER_PHASE,
+                                   PatternEvaluator.PHASES - 1)
+                self._get_codes(p, o).tofile(codes)
+                phase.astype(np.uint8).tofile(phases)
+                diffs.astype(np.float32).tofile(targets)
+                count += len(p)
+                self._report("extracted", count, time.perf_counter() - start)
+        
+        with open(meta, "w") as f:
+            json.dump({"sources": sources, "count": count}, f)
+        return count
+    
+    def fit(self, epochs: int = 4, rate: float = 0.02) -> float:
+        ''' This method fits weights to the extracted situations.
+        
+        :param epochs: the number of passes over the situations
+        :param rate: a learning rate
+        :return: the mean squared error of the last epoch in discs
+        '''
+        with open(os.path.join(self.cache, "meta.json")) as f:
+            count = json.load(f)["count"]
+        codes = np.memmap(self._path("codes"), dtype=np.int32, mode="r",
+                          shape=(count, self.instances))
+        phases = np.memmap(self._path("phases"), dtype=np.uint8, mode="r", shape=(count,))
+        targets = np.memmap(self._path("targets"), dtype=np.float32, mode="r", shape=(count,))
+        
+        error = 0.0
+        for epoch in range(epochs):
+            error = 0.0
+            start = time.perf_counter()
+            for begin in range(0, count, self.chunk):
+                x = np.asarray(codes[begin:begin + self.chunk])
+                ph = np.asarray(phases[begin:begin + self.chunk])
+                y = np.asarray(targets[begin:begin + self.chunk])
+                for phase in np.unique(ph):
+                    mask = ph == phase
+                    xs = x[mask]
+                    w = self.weights[phase]
+                    diff = y[mask] - w[xs].sum(axis=1)
+                    error += float(np.dot(diff, diff))
+                    sums = np.bincount(xs.ravel(), weights=np.repeat(diff, self.instances),
+                                       minlength=self.size)
+                    counts = np.bincount(xs.ravel(), minlength=self.size)
+                    w += rate * sums / np.maximum(counts, 1)
+                self._report("epoch %d" % (epoch + 1), min(begin + self.chunk, count),
+                             time.perf_counter() - start)
+            error /= max(count, 1)
+        return error
+    
+    def get_evaluator(self) -> PatternEvaluator:
+        ''' This method creates an evaluator of the fitted weights.
+        
+        :return: a created instance
+        '''
+        weights = []
+        for w in self.weights:
+            w = np.rint(w * Searcher.DISC_SCORE).astype(np.int32)
+            weights.append([array('i', w[self.offsets[k]:self.offsets[k + 1]].tobytes())
+                            for k in range(len(PATTERNS))])
+        return PatternEvaluator(weights)
+    
+    def _path(self, name: str) -> str:
+        ''' This method returns a path of a file in the cache.
+        
+        :param name: a name of the file
+        :return: a path of the file
+        '''
+        return os.path.join(self.cache, name + ".bin")
+    
+    def _read_chunks(self, paths: list):
+        ''' This method yields situations of games in chunks.
+        
+        :param paths: paths of record files
+        :return: a generator of tuples of arrays of boards of the players
+                 to move, boards of the opponents and final disc
+                 differences from the players to move
+        '''
+        p, o, diffs = [], [], []
+        for path in paths:
+            for r in record.read(path):
+                diff = r["black"] - r["white"]
+                c = Color.BLACK
+                for board in record.replay(r["moves"]):
+                    c = Color.get_opponent(c)
+                    mp, mo = board.get_discs(c)
+                    p.append(mp)
+                    o.append(mo)
+                    diffs.append(diff if c is Color.BLACK else -diff)
+                if len(p) >= self.chunk:
+                    yield (batch.to_array(p), batch.to_array(o), np.array(diffs))
+                    p, o, diffs = [], [], []
+        if len(p) > 0:
+            yield (batch.to_array(p), batch.to_array(o), np.array(diffs))
+    
+    def _get_codes(self, p: np.ndarray, o: np.ndarray) -> np.ndarray:
+        ''' This method computes indices of weights of all instances of
+        patterns.  A digit of a code is 1 for a disc of the player to move
+        and 2 for a disc of the opponent.
+        
+        :param p: an array of boards of the players to move
+        :param o: an array of boards of the opponents
+        :return: an array of indices of the shape (situations, instances)
+        '''
+        codes = np.zeros((len(p), self.instances), dtype=np.int32)
+        one = np.uint64(1)
+        for i, image in enumerate(self.evaluator.instances):
+            code = np.full(len(p), self.offsets[self.evaluator.kinds[i]], dtype=np.int32)
+            for j, k in enumerate(image):
+                k = np.uint64(k)
+                code += ((p >> k) & one).astype(np.int32) * 3 ** j
+                code += ((o >> k) & one).astype(np.int32) * (2 * 3 ** j)
+            codes[:, i] = code
+        return codes
+    
+    def _report(self, stage: str, count: int, elapsed: float) -> None:
+        ''' This method writes the progress.
+        
+        :param stage: a name of the stage
+        :param count: the number of processed situations
+        :param elapsed: elapsed seconds of the stage
+        '''
+        if self.report is None:
+            return
+        self.report.write("%s: %d positions, %.0f positions/sec\n"
+                          % (stage, count, count / max(elapsed, 1e-9)))
+        self.report.flush()
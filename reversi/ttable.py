@@ -0,0 +1,145 @@
+# ==========================================================
+# ttable.py
+# Copyright (C) 2023 Kei Shioda.  All rights reserved.
+# ==========================================================
+''' This module defines a transposition table of search results.
+'''
+from __future__ import annotations
+from array import array
+
+class Bound:
+    ''' This class defines kinds of stored scores.
+    '''
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+
+class TranspositionTable:
+    ''' This class stores search results in a fixed size table.
+    
+    The table consists of buckets of two entries.  The first entry keeps
+    the deepest result (depth-preferred) and the second entry keeps the
+    latest one (always-replace).  Each entry is two 64-bit words, a hash
+    xor-ed with the data and packed data of score, depth, bound, move and
+    generation.  An entry whose words were written by different stores at
+    the same time, which may happen in a table shared by processes, does
+    not match the hash and is ignored.
+    Results of older searches in the first entry are replaced regardless
+    of the depth.
+    '''
+    WORDS_PER_BUCKET = 4
+    BYTES_PER_BUCKET = 32
+    NO_MOVE = 0xff
+    
+    SCORE_BITS = 32
+    SCORE_OFFSET = 1 << (SCORE_BITS - 1)
+    DEPTH_SHIFT = 32
+    BOUND_SHIFT = 40
+    MOVE_SHIFT = 42
+    GENERATION_SHIFT = 50
+    GENERATION_MASK = 0x3fff
+    
+    def __init__(self, megabytes: float = 16) -> TranspositionTable:
+        ''' This method creates an instance.
+        
+        :param megabytes: the maximum memory size of the table
+        :return: a created instance
+        '''
+        buckets = 1
+        while buckets * 2 * self.BYTES_PER_BUCKET <= megabytes * 1024 * 1024:
+            buckets *= 2
+        self.mask = buckets - 1
+        self.table = self._allocate(buckets * self.WORDS_PER_BUCKET)
+        self.generation = 1
+        self.hits = 0
+        self.misses = 0
+        self.overwrites = 0
+    
+    def _allocate(self, words: int):
+        ''' This method allocates words of the table filled with zero.
+        
+        :param words: the number of 64-bit words
+        :return: a sequence of 64-bit words
+        '''
+        return array('Q', bytes(words * 8))
+    
+    def clear(self) -> None:
+        ''' This method removes all entries and resets the counters.
+        '''
+        self.table = self._allocate(len(self.table))
+        self.generation = 1
+        self.hits = 0
+        self.misses = 0
+        self.overwrites = 0
+    
+    def new_search(self) -> None:
+        ''' This method makes entries stored so far older than new ones.
+        '''
+        self.generation = self.generation % self.GENERATION_MASK + 1
+    
+    def probe(self, h: int) -> tuple:
+        ''' This method looks up a result of the given situation.
+        
+        :param h: a hash of a board situation
+        :return: a tuple of depth, bound, score and the bit of the best
+                 move (0 if unknown), or None if there is no result
+        '''
+        i = (h & self.mask) * self.WORDS_PER_BUCKET
+        t = self.table
+        if t[i + 1] and t[i] ^ t[i + 1] == h:
+            data = t[i + 1]
+        elif t[i + 3] and t[i + 2] ^ t[i + 3] == h:
+            data = t[i + 3]
+        else:
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        move = (data >> self.MOVE_SHIFT) & 0xff
+        return ((data >> self.DEPTH_SHIFT) & 0xff,
+                (data >> self.BOUND_SHIFT) & 0x3,
+                (data & 0xffffffff) - self.SCORE_OFFSET,
+                0 if move == self.NO_MOVE else 1 << move)
+    
+    def store(self, h: int, depth: int, bound: int, score: int, move: int) -> None:
+        ''' This method stores a result of the given situation.
+        
+        :param h: a hash of a board situation
+        :param depth: the searched depth
+        :param bound: a kind of the score defined in Bound
+        :param score: the score
+        :param move: a bit of the best move, or 0 if unknown
+        '''
+        data = ((score + self.SCORE_OFFSET)
+                | depth << self.DEPTH_SHIFT
+                | bound << self.BOUND_SHIFT
+                | (move.bit_length() - 1 if move else self.NO_MOVE) << self.MOVE_SHIFT
+                | self.generation << self.GENERATION_SHIFT)
+        i = (h & self.mask) * self.WORDS_PER_BUCKET
+        t = self.table
+        deep = t[i + 1]
+        same = t[i] ^ deep == h
+        if (deep == 0 or same
+                or depth >= (deep >> self.DEPTH_SHIFT) & 0xff
+                or deep >> self.GENERATION_SHIFT != self.generation):
+            if deep and not same:
+                # the replaced entry moves to the always-replace entry
+                if t[i + 3] and t[i + 2] ^ t[i + 3] != h:
+                    self.overwrites += 1
+                t[i + 2] = t[i]
+                t[i + 3] = deep
+            t[i] = h ^ data
+            t[i + 1] = data
+        else:
+            if t[i + 3] and t[i + 2] ^ t[i + 3] != h:
+                self.overwrites += 1
+            t[i + 2] = h ^ data
+            t[i + 3] = data
+    
+    def get_hit_rate(self) -> float:
+        ''' This method computes the ratio of successful probes.
+        
+        :return: a hit rate between 0 and 1
+        '''
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
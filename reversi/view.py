@@ -103,14 +103,18 @@ class GameView(View):
         :return: a code showint the user action
         '''
         s = ""
+        size = self.game.board.size
         while True:
             s = input()
-            if re.search("[1-8],[1-8]", s):
+            match = re.fullmatch("([0-9]+),([0-9]+)", s)
+            if match and all(1 <= int(v) <= size for v in match.groups()):
                 return "PUT," + s
             elif s == "p":
                 return "PASS"
             elif s == "s":
                 return "SURRENDER"
+            elif s == "u":
+                return "UNDO"
             else:
                 print("your input is invalid.  input correct action.")
         
@@ -123,22 +127,23 @@ class GameView(View):
                         otherwise, set false.
         '''
         board = self.game.get_board_situation()
+        width = len(str(len(board)))
         print("<BOARD>")
         print("========================")
-        print(" ", end=" ")
+        print(" " * width, end=" ")
         for i in range(len(board)):
-            print(i + 1, end=" ")
+            print(str(i + 1).rjust(width), end=" ")
         print("")
         for j in range(len(board)):
-            print(j + 1, end=" ")
+            print(str(j + 1).rjust(width), end=" ")
             for i in range(len(board[j])):
                 match board[j][i]:
                     case Color.BLACK:
-                        print("B", end=" ")
+                        print("B".rjust(width), end=" ")
                     case Color.WHITE:
-                        print("W", end=" ")
+                        print("W".rjust(width), end=" ")
                     case _:
-                        print("-", end=" ")
+                        print("-".rjust(width), end=" ")
             print("")
         print("=======================")
         print("this is " + Color.to_str(c) + " turn")
@@ -149,6 +154,7 @@ class GameView(View):
             print("x,y: coordinates putting your disc at")
             print("p: pass")
             print("s: surrender")
+            print("u: undo")
             print("----------------------------------------")
         else:
             print("the opponent player is thinking now")
@@ -190,7 +196,8 @@ class ErrorView:
     '''
     MESSAGES = { 1:"your position is invalid.  put on another position",
                  2:"your pass is invalid.  put a disc on a valid position",
-                 3:"something wrong has happend"
+                 3:"something wrong has happend",
+                 4:"there is no move to undo"
                 }
     
     def input(self):
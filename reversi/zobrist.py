@@ -0,0 +1,63 @@
+# ==========================================================
+# zobrist.py
+# Copyright (C) 2023 Kei Shioda.  All rights reserved.
+# ==========================================================
+''' This module defines Zobrist keys to hash board situations.
+
+A hash is the exclusive or of the keys of all discs on the board,
+and SIDE is added when the white player is to move.  There are keys of
+the squares of the largest board.
+'''
+from __future__ import annotations
+from reversi.bitboard import MAX_SIZE
+import random
+
+_random = random.Random(20230101)
+
+BLACK = [_random.getrandbits(64) for i in range(64)]
+WHITE = [_random.getrandbits(64) for i in range(64)]
+SIDE = _random.getrandbits(64)
+
+# keys of squares beyond 64 are made after SIDE to keep the keys of 8x8 boards
+BLACK += [_random.getrandbits(64) for i in range(64, MAX_SIZE * MAX_SIZE)]
+WHITE += [_random.getrandbits(64) for i in range(64, MAX_SIZE * MAX_SIZE)]
+FLIP = [BLACK[i] ^ WHITE[i] for i in range(MAX_SIZE * MAX_SIZE)]
+
+def get_hash(black: int, white: int, is_white: bool) -> int:
+    ''' This method computes a hash of a board situation from scratch.
+    
+    :param black: the board of the black player
+    :param white: the board of the white player
+    :param is_white: if the white player is to move, set true
+    :return: a 64-bit hash
+    '''
+    h = SIDE if is_white else 0
+    white &= ~black
+    while black:
+        low = black & -black
+        h ^= BLACK[low.bit_length() - 1]
+        black ^= low
+    while white:
+        low = white & -white
+        h ^= WHITE[low.bit_length() - 1]
+        white ^= low
+    return h
+
+def get_change(m: int, f: int, is_white: bool) -> int:
+    ''' This method computes the change of a hash by a move or a pass.
+    
+    :param m: an int whose only one bit indicates the putting square,
+              or 0 for a pass
+    :param f: a board of flipped discs
+    :param is_white: if the moving player is white, set true
+    :return: an int to be xored with the hash
+    '''
+    h = SIDE
+    if m:
+        keys = WHITE if is_white else BLACK
+        h ^= keys[m.bit_length() - 1]
+        while f:
+            low = f & -f
+            h ^= FLIP[low.bit_length() - 1]
+            f ^= low
+    return h